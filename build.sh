@@ -5,8 +5,12 @@ set -o errexit
 python --version
 pip install -r requirements.txt
 
-python manage.py collectstatic --no-input
 python manage.py migrate
+# Icon fonts are subset to the icons in use, including package inclusion/exclusion icons from the database
+python manage.py build_icon_font
+# Pruned site stylesheet and per-page critical CSS, extracted from rendered pages (after the icon CSS it bundles)
+python manage.py build_css
+python manage.py collectstatic --no-input
 
 # Optionally ensure an admin user exists when all values are provided.
 # Set DJANGO_SUPERUSER_USERNAME, DJANGO_SUPERUSER_EMAIL, DJANGO_SUPERUSER_PASSWORD in Render.
@@ -0,0 +1,21 @@
+"""Gunicorn settings, loaded from the working directory by ``gunicorn nature_holidays.wsgi:application``."""
+import os
+import shutil
+from pathlib import Path
+
+# Workers write their Prometheus samples here so /metrics adds them up (packages/metrics.py).
+# Set before any worker imports prometheus_client, which decides its storage on import.
+metrics_dir = Path(os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/nature_holidays_metrics'))
+
+
+def on_starting(server):
+    # Samples left by a previous master's workers would be added to ours
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    metrics_dir.mkdir(parents=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    # Drops the dead worker from the live* gauges; its counters stay in the totals
+    multiprocess.mark_process_dead(worker.pid)
@@ -48,10 +48,13 @@ else:
     
     MIDDLEWARE = [
         'django.middleware.security.SecurityMiddleware',
+        'packages.middleware.RequestTimingMiddleware',
         'django.contrib.sessions.middleware.SessionMiddleware',
         'django.middleware.common.CommonMiddleware',
         'django.middleware.csrf.CsrfViewMiddleware',
         'django.contrib.auth.middleware.AuthenticationMiddleware',
+        # Staff-only ?_profile=1 (needs request.user)
+        'packages.middleware.ProfilingMiddleware',
         'django.contrib.messages.middleware.MessageMiddleware',
         'django.middleware.clickjacking.XFrameOptionsMiddleware',
     ]
@@ -60,7 +63,7 @@ else:
     
     TEMPLATES = [
         {
-            'BACKEND': 'django.template.backends.django.DjangoTemplates',
+            'BACKEND': 'packages.timing.TimedDjangoTemplates',
             'DIRS': [BASE_DIR / 'templates'],
             'APP_DIRS': True,
             'OPTIONS': {
@@ -129,10 +132,43 @@ else:
             'API_KEY': CLOUDINARY_API_KEY,
             'API_SECRET': CLOUDINARY_API_SECRET,
         }
-        DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
+        # Memoises media URLs per worker and serves srcset sizes as Cloudinary transformations
+        DEFAULT_FILE_STORAGE = 'packages.storage_cloudinary.CachedMediaCloudinaryStorage'
     else:
         # Fall back to local storage if no Cloudinary credentials
-        DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
+        DEFAULT_FILE_STORAGE = 'packages.storage.CachedFileSystemStorage'
+    
+    # Cache - per-process memory is enough for a single runserver
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'nature-holidays',
+        }
+    }
+    HOME_CONTEXT_CACHE_TIMEOUT = config('HOME_CONTEXT_CACHE_TIMEOUT', default=60 * 60, cast=int)
+    PACKAGE_SEARCH_CACHE_TIMEOUT = config('PACKAGE_SEARCH_CACHE_TIMEOUT', default=2 * 60, cast=int)
+
+    # Listing pagination: 'offset' (numbered pages) or 'keyset' (cursor links, estimated totals)
+    LISTING_PAGINATION = config('LISTING_PAGINATION', default='offset')
+
+    # Seconds between write-behind flushes of view counters (0 = write on every view)
+    COUNTER_FLUSH_INTERVAL = config('COUNTER_FLUSH_INTERVAL', default=30, cast=int)
+
+    # Bearer token Prometheus sends to /metrics; empty allows staff logins only
+    METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+    # Slow-query log: SELECTs this slow (ms) are EXPLAINed into the admin's Slow Queries; 0 turns it off.
+    # EXPLAIN ANALYZE (Postgres) runs the query again to get actual timings.
+    QUERY_LOG_SLOW_MS = config('QUERY_LOG_SLOW_MS', default=100, cast=int)
+    QUERY_LOG_EXPLAIN_ANALYZE = config('QUERY_LOG_EXPLAIN_ANALYZE', default=False, cast=bool)
+
+    # Where staff-requested request profiles (?_profile=1) are written; the newest 20 are kept
+    PROFILE_DIR = config('PROFILE_DIR', default='/tmp/nature_holidays_profiles')
+
+    # Rendered public pages served to anonymous visitors (packages/pagecache.py); content edits invalidate them.
+    # PAGE_CACHE_COOKIES names cookies that change what a page renders, so each value gets its own copy.
+    PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=10 * 60, cast=int)
+    PAGE_CACHE_COOKIES = [name.strip() for name in config('PAGE_CACHE_COOKIES', default='').split(',') if name.strip()]
     
     # Email Configuration
     EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -49,10 +49,14 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Add whitenoise for static files
+    # Server-Timing header and a timing log line per request (below WhiteNoise: static files are not timed)
+    'packages.middleware.RequestTimingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Staff-only ?_profile=1 (needs request.user)
+    'packages.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -61,7 +65,8 @@ ROOT_URLCONF = 'nature_holidays.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # The Django backend, also timing renders for RequestTimingMiddleware
+        'BACKEND': 'packages.timing.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -125,7 +130,55 @@ CLOUDINARY_STORAGE = {
     'API_KEY': config('CLOUDINARY_API_KEY'),
     'API_SECRET': config('CLOUDINARY_API_SECRET'),
 }
-DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
+# Memoises media URLs per worker and serves srcset sizes as Cloudinary transformations
+DEFAULT_FILE_STORAGE = 'packages.storage_cloudinary.CachedMediaCloudinaryStorage'
+
+# Cache - must be shared by every gunicorn worker so that signal-driven
+# invalidation (packages/signals.py) reaches all of them. Redis when
+# REDIS_URL is set (requires the `redis` package), otherwise a file cache
+# on the instance's local disk.
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': config('CACHE_DIR', default='/tmp/nature_holidays_cache'),
+            # Cached pages, searches and facets come to thousands of entries; Django's default of 300
+            # would cull a third of the directory every time it fills
+            'OPTIONS': {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=10000, cast=int)},
+        }
+    }
+HOME_CONTEXT_CACHE_TIMEOUT = config('HOME_CONTEXT_CACHE_TIMEOUT', default=60 * 60, cast=int)
+PACKAGE_SEARCH_CACHE_TIMEOUT = config('PACKAGE_SEARCH_CACHE_TIMEOUT', default=2 * 60, cast=int)
+
+# Listing pagination: 'offset' (numbered pages) or 'keyset' (cursor links, estimated totals)
+LISTING_PAGINATION = config('LISTING_PAGINATION', default='offset')
+
+# Seconds between write-behind flushes of view counters (0 = write on every view)
+COUNTER_FLUSH_INTERVAL = config('COUNTER_FLUSH_INTERVAL', default=30, cast=int)
+
+# Bearer token Prometheus sends to /metrics; empty allows staff logins only
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Slow-query log: SELECTs this slow (ms) are EXPLAINed into the admin's Slow Queries; 0 turns it off.
+# EXPLAIN ANALYZE (Postgres) runs the query again to get actual timings.
+QUERY_LOG_SLOW_MS = config('QUERY_LOG_SLOW_MS', default=100, cast=int)
+QUERY_LOG_EXPLAIN_ANALYZE = config('QUERY_LOG_EXPLAIN_ANALYZE', default=False, cast=bool)
+
+# Where staff-requested request profiles (?_profile=1) are written; the newest 20 are kept
+PROFILE_DIR = config('PROFILE_DIR', default='/tmp/nature_holidays_profiles')
+
+# Rendered public pages served to anonymous visitors (packages/pagecache.py); content edits invalidate them.
+# PAGE_CACHE_COOKIES names cookies that change what a page renders, so each value gets its own copy.
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=10 * 60, cast=int)
+PAGE_CACHE_COOKIES = [name.strip() for name in config('PAGE_CACHE_COOKIES', default='').split(',') if name.strip()]
 
 # Email Configuration
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -153,8 +206,12 @@ CSRF_COOKIE_SECURE = True
 X_FRAME_OPTIONS = 'DENY'
 
 # Static files handling with whitenoise
-# Use non-manifest storage to avoid failing collectstatic on missing sourcemaps.
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
+# Content-hashed names with Brotli (needs the Brotli package) and gzip copies.
+# WhiteNoise serves hashed files with a 10-year "immutable" Cache-Control;
+# anything still requested by its plain name is cached for WHITENOISE_MAX_AGE.
+# Theme CSS references to files it never shipped are left unhashed rather
+# than failing collectstatic (see packages/storage.py).
+STATICFILES_STORAGE = 'packages.storage.HashedStaticFilesStorage'
 
 # Logging configuration
 LOGGING = {
@@ -175,5 +232,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        # One line per request from RequestTimingMiddleware; WARNING keeps only duplicate-query reports
+        'packages.timing': {
+            'handlers': ['console'],
+            'level': config('REQUEST_TIMING_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
     },
 }
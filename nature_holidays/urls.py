@@ -19,8 +19,12 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from packages.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # Prometheus scrape target (staff or METRICS_TOKEN)
+    path('metrics', metrics_view, name='metrics'),
     path('', include('packages.urls')),
 ]
 
@@ -1,5 +1,10 @@
 from django.contrib import admin
 from django.db import models
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.html import format_html, format_html_join
 from unfold.admin import ModelAdmin, TabularInline
 from unfold.widgets import (
     UnfoldAdminTextInputWidget,
@@ -7,7 +12,8 @@ from unfold.widgets import (
     UnfoldAdminSelectWidget,
     UnfoldBooleanSwitchWidget,
 )
-from .models import Category, Offer, Package, PackageImage, TeamMember, SiteStats, NewsletterSubscription, CTASection, Itinerary, PackageInclusion, PackageExclusion, BlogCategory, BlogTag, Blog, BlogComment, Contact, InstagramPost, HeroSlide, SitePageMedia
+from .models import Category, Offer, Package, PackageImage, TeamMember, SiteStats, NewsletterSubscription, NewsletterCampaign, CTASection, Itinerary, PackageInclusion, PackageExclusion, BlogCategory, BlogTag, Blog, BlogComment, Contact, OutboundEmail, InstagramPost, HeroSlide, SitePageMedia, QueryFingerprint, SlowQuery, RequestProfile
+from .profiling import FORMATS, profile_path, top_functions
 
 UNFOLD_FORMFIELD_OVERRIDES = {
     models.CharField: {"widget": UnfoldAdminTextInputWidget},
@@ -92,6 +98,36 @@ class NewsletterSubscriptionAdmin(ModelAdmin):
     search_fields = ('email',)
     readonly_fields = ('subscribed_at',)
 
+@admin.register(NewsletterCampaign)
+class NewsletterCampaignAdmin(ModelAdmin):
+    formfield_overrides = UNFOLD_FORMFIELD_OVERRIDES
+    list_display = ('subject', 'status', 'sent_count', 'failed_count', 'started_at', 'finished_at')
+    list_filter = ('status',)
+    search_fields = ('subject',)
+    readonly_fields = ('status', 'last_subscriber_id', 'sent_count', 'failed_count', 'last_error',
+                       'claimed_until', 'started_at', 'finished_at', 'created_at', 'updated_at')
+    actions = ('queue_campaigns',)
+
+    fieldsets = (
+        ('Newsletter', {
+            'classes': ('tab',),
+            'fields': ('subject', 'content')
+        }),
+        ('Delivery', {
+            'classes': ('tab',),
+            'fields': ('status', 'sent_count', 'failed_count', 'last_subscriber_id', 'last_error', 'claimed_until', 'started_at', 'finished_at')
+        }),
+        ('Timestamps', {
+            'classes': ('tab',),
+            'fields': ('created_at', 'updated_at')
+        }),
+    )
+
+    @admin.action(description='Queue selected campaigns for sending')
+    def queue_campaigns(self, request, queryset):
+        updated = queryset.filter(status='draft').update(status='queued')
+        self.message_user(request, f'{updated} campaign(s) queued; the send_newsletter command delivers them.')
+
 @admin.register(CTASection)
 class CTASectionAdmin(ModelAdmin):
     formfield_overrides = UNFOLD_FORMFIELD_OVERRIDES
@@ -217,6 +253,25 @@ class ContactAdmin(ModelAdmin):
     )
 
 
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(ModelAdmin):
+    formfield_overrides = UNFOLD_FORMFIELD_OVERRIDES
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('subject', 'to', 'last_error')
+    readonly_fields = ('subject', 'body', 'content_subtype', 'from_email', 'to', 'contact', 'status', 'attempts',
+                       'next_attempt_at', 'last_error', 'sent_at', 'created_at')
+    actions = ('retry_now',)
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Retry selected emails now')
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(status='pending', next_attempt_at=timezone.now())
+        self.message_user(request, f'{updated} email(s) queued for the next worker pass.')
+
+
 @admin.register(InstagramPost)
 class InstagramPostAdmin(ModelAdmin):
     formfield_overrides = UNFOLD_FORMFIELD_OVERRIDES
@@ -298,3 +353,92 @@ class SitePageMediaAdmin(ModelAdmin):
 
     def has_delete_permission(self, request, obj=None):
         return False
+
+
+class ReadOnlyAdminMixin:
+    """Rows written by the site itself (see packages/querylog.py): view and delete only."""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(QueryFingerprint)
+class QueryFingerprintAdmin(ReadOnlyAdminMixin, ModelAdmin):
+    list_display = ('statement', 'view', 'calls', 'total_ms_display', 'mean_ms_display', 'max_ms_display',
+                    'max_per_request', 'slow_calls', 'last_seen')
+    list_filter = ('view',)
+    search_fields = ('sql', 'view', 'fingerprint')
+    ordering = ('-total_ms',)
+    fields = ('fingerprint', 'view', 'sql', 'calls', 'total_ms', 'max_ms', 'max_per_request', 'slow_calls',
+              'first_seen', 'last_seen')
+
+    @admin.display(description='SQL')
+    def statement(self, obj):
+        return obj.sql[:140]
+
+    @admin.display(description='Total ms', ordering='total_ms')
+    def total_ms_display(self, obj):
+        return f'{obj.total_ms:.0f}'
+
+    @admin.display(description='Mean ms')
+    def mean_ms_display(self, obj):
+        return f'{obj.mean_ms:.1f}'
+
+    @admin.display(description='Max ms', ordering='max_ms')
+    def max_ms_display(self, obj):
+        return f'{obj.max_ms:.1f}'
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(ReadOnlyAdminMixin, ModelAdmin):
+    list_display = ('statement', 'view', 'duration_ms', 'analyzed', 'created_at')
+    list_filter = ('view', 'analyzed')
+    search_fields = ('sql', 'plan', 'fingerprint')
+    fields = ('fingerprint', 'view', 'duration_ms', 'analyzed', 'created_at', 'sql', 'plan')
+
+    @admin.display(description='SQL')
+    def statement(self, obj):
+        return obj.sql[:140]
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(ReadOnlyAdminMixin, ModelAdmin):
+    list_display = ('path', 'view', 'status_code', 'duration_ms_display', 'queries', 'user', 'created_at', 'downloads')
+    list_filter = ('view', 'status_code')
+    search_fields = ('path', 'view', 'name')
+    fields = ('name', 'method', 'path', 'view', 'status_code', 'duration_ms', 'queries', 'samples', 'user',
+              'created_at', 'downloads', 'hot_functions')
+    readonly_fields = ('downloads', 'hot_functions')
+
+    def get_urls(self):
+        return [
+            path('<int:pk>/download/<str:fmt>/', self.admin_site.admin_view(self.download),
+                 name='packages_requestprofile_download'),
+        ] + super().get_urls()
+
+    def download(self, request, pk, fmt):
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        if not self.has_view_permission(request, profile):
+            raise Http404
+        location = profile_path(profile.name, fmt) if fmt in FORMATS else None
+        if location is None or not location.exists():
+            raise Http404('Profile file not found; it may have been rotated out or written on another server.')
+        return FileResponse(open(location, 'rb'), as_attachment=True, filename=location.name, content_type=FORMATS[fmt])
+
+    @admin.display(description='Duration ms', ordering='duration_ms')
+    def duration_ms_display(self, obj):
+        return f'{obj.duration_ms:.0f}'
+
+    @admin.display(description='Download')
+    def downloads(self, obj):
+        return format_html_join(' · ', '<a href="{}">.{}</a>', (
+            (reverse('admin:packages_requestprofile_download', args=[obj.pk, fmt]), fmt) for fmt in FORMATS
+        ))
+
+    @admin.display(description='Top functions (cumulative time)')
+    def hot_functions(self, obj):
+        report = top_functions(obj)
+        return format_html('<pre style="white-space: pre; overflow-x: auto">{}</pre>', report) if report else '-'
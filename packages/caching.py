@@ -0,0 +1,123 @@
+"""Versioned caching for admin-managed content.
+
+Public pages mostly render data that only changes when an editor saves
+something in admin. Cached entries are stored under the current *content
+version*; ``bump_content_version()`` (wired to model signals in
+``packages/signals.py``) moves every reader onto a fresh key so stale
+entries simply expire.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .metrics import record_cache_lookup
+from .models import Package, Category, Offer, TeamMember, SiteStats, InstagramPost, HeroSlide, CTASection
+
+CONTENT_VERSION_KEY = 'content:version'
+HOME_CONTEXT_TIMEOUT = getattr(settings, 'HOME_CONTEXT_CACHE_TIMEOUT', 60 * 60)
+
+
+def _fresh_version():
+    # Seed from the clock so an evicted version key never falls back to a
+    # number that still has stale entries stored under it.
+    return int(time.time() * 1000)
+
+
+def get_version(key):
+    """The counter stored under ``key``, seeded on first use."""
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _fresh_version(), timeout=None)
+        version = cache.get(key, _fresh_version())
+    return version
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_version(), timeout=None)
+
+
+def get_content_version():
+    return get_version(CONTENT_VERSION_KEY)
+
+
+def bump_content_version(**kwargs):
+    """Invalidate all versioned entries. Usable directly as a signal receiver."""
+    bump_version(CONTENT_VERSION_KEY)
+
+
+def versioned_key(name):
+    return f'{name}:v{get_content_version()}'
+
+
+def build_home_context():
+    """Run the home page queries and return a fully evaluated, picklable context."""
+    # Get featured packages for hero slider
+    featured_packages = list(Package.objects.filter(
+        is_active=True,
+        is_featured=True
+    )[:3])
+
+    # Get popular packages for destination section
+    popular_packages = list(Package.objects.filter(
+        is_active=True,
+        is_popular=True
+    )[:8])
+
+    # Get all categories with package counts
+    categories = list(Category.objects.filter(is_active=True).annotate(
+        package_count=Count('package', filter=Q(package__is_active=True))
+    ))
+
+    # Get active offers - show the one with highest discount first
+    active_offers = list(Offer.objects.filter(
+        is_active=True
+    ).order_by('-discount_percentage', 'valid_to')[:3])
+
+    # Calculate highest discount percentage
+    highest_discount = 0
+    if active_offers:
+        highest_discount = max(offer.discount_percentage for offer in active_offers)
+
+    # Get team members
+    team_members = list(TeamMember.objects.filter(is_active=True)[:4])
+
+    # Instagram feed for homepage slider
+    instagram_posts = list(InstagramPost.objects.filter(is_active=True))
+
+    # Get site statistics
+    try:
+        site_stats = SiteStats.objects.first()
+    except Exception:
+        site_stats = None
+
+    hero_slides = list(HeroSlide.objects.filter(is_active=True))
+    cta_section = CTASection.objects.filter(is_active=True).first()
+
+    return {
+        'featured_packages': featured_packages,
+        'popular_packages': popular_packages,
+        'categories': categories,
+        'active_offers': active_offers,
+        'highest_discount': highest_discount,
+        'team_members': team_members,
+        'instagram_posts': instagram_posts,
+        'site_stats': site_stats,
+        'hero_slides': hero_slides,
+        'cta_section': cta_section,
+    }
+
+
+def get_home_context():
+    """Return the home context from cache, building it on a miss."""
+    key = versioned_key('home_context')
+    context = cache.get(key)
+    record_cache_lookup('home_context', context is not None)
+    if context is None:
+        context = build_home_context()
+        cache.set(key, context, HOME_CONTEXT_TIMEOUT)
+    return context
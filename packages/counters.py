@@ -0,0 +1,104 @@
+"""Write-behind counters for hot, low-value columns such as Blog.views_count.
+
+Incrementing the row on every read would serialise all readers of a popular
+post on one row lock. Instead each worker process tallies increments in
+memory and a background thread flushes them every few seconds as a handful
+of ``UPDATE ... SET views_count = views_count + n`` statements. Every worker
+flushes its own tally and the database adds them up, so nothing is lost
+however many gunicorn workers serve the site; a failed flush puts its counts
+back for the next attempt, and the remainder is flushed at process exit.
+"""
+import atexit
+import logging
+import os
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+
+from .models import Blog
+
+logger = logging.getLogger(__name__)
+
+# A flush is triggered early once this many distinct rows are pending.
+MAX_PENDING_ROWS = 500
+
+
+class BufferedCounter:
+    def __init__(self, model, field):
+        self.model = model
+        self.field = field
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._counts = Counter()
+        self._thread = None
+
+    def add(self, pk, amount=1):
+        # 0 flushes on every call (no thread), for tests and single-process debugging.
+        interval = getattr(settings, 'COUNTER_FLUSH_INTERVAL', 30)
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked after use (gunicorn --preload): the parent's tally and thread aren't ours
+                self._reset()
+            self._counts[pk] += amount
+            if interval and self._thread is None:
+                self._start(interval)
+            full = len(self._counts) >= MAX_PENDING_ROWS
+        if not interval:
+            self.flush()
+        elif full:
+            self._wake.set()
+
+    def pending(self, pk):
+        """Increments for ``pk`` not yet written to the database by this process."""
+        with self._lock:
+            return self._counts[pk]
+
+    def flush(self):
+        """Write the pending increments; returns how many were written."""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        if not counts:
+            return 0
+        # One UPDATE per distinct increment rather than one per row
+        by_amount = defaultdict(list)
+        for pk, amount in counts.items():
+            by_amount[amount].append(pk)
+        try:
+            with transaction.atomic():
+                for amount, pks in by_amount.items():
+                    self.model._base_manager.filter(pk__in=pks).update(**{self.field: F(self.field) + amount})
+        except DatabaseError:
+            logger.exception('Flushing %s.%s failed; keeping %d increments for the next attempt',
+                             self.model.__name__, self.field, sum(counts.values()))
+            with self._lock:
+                self._counts.update(counts)
+            return 0
+        return sum(counts.values())
+
+    def _start(self, interval):
+        self._thread = threading.Thread(
+            target=self._run, args=(interval,), daemon=True,
+            name=f'{self.model.__name__}.{self.field} flusher',
+        )
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self, interval):
+        while True:
+            self._wake.wait(interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            finally:
+                # This thread's own connection; don't hold it open between flushes
+                connection.close()
+
+
+blog_views = BufferedCounter(Blog, 'views_count')
@@ -0,0 +1,212 @@
+"""Stylesheet pruning and per-page critical CSS.
+
+The theme ships ~1 MB of stylesheets, all render-blocking. The ``build_css``
+command writes:
+
+* ``css/site.min.css``: the site-wide stylesheets, concatenated in their
+  original order and pruned to selectors whose class and id names occur in
+  the templates, the project's Python or any JavaScript file (plugins add
+  their own classes at runtime).
+* ``css/critical/<page type>.css``: the rules from that bundle (plus the
+  page's own stylesheets) matching the markup above the fold of a rendered
+  page. The ``page_styles`` tag in ``templatetags/assets.py`` inlines it and
+  loads the bundle without blocking rendering.
+"""
+import re
+from pathlib import Path
+
+from django.conf import settings
+
+# Site-wide stylesheets, in the order pages used to load them.
+SITE_STYLESHEETS = [
+    'css/bootstrap.min.css', 'css/icons.min.css', 'css/animate.css', 'css/magnific-popup.css',
+    'css/meanmenu.css', 'css/swiper-bundle.min.css', 'css/datepickerboot.css', 'css/nice-select.css',
+    'css/color.css', 'css/main.css', 'css/offers.css', 'css/inclusions-exclusions.css',
+]
+SITE_CSS = 'css/site.min.css'
+CRITICAL_DIR = 'css/critical'
+# Page types with critical CSS: the stylesheets the page adds to the bundle.
+PAGE_STYLESHEETS = {
+    'home': ['css/team.css'],
+    'list': ['css/packages.css'],
+    'detail': ['css/packages.css'],
+    'blog': [],
+}
+# Top-level <section>s of a page counted as above the fold, after the header.
+FOLD_SECTIONS = 1
+# Classes plugins build from string fragments, so they never appear whole in their source.
+SAFELIST = re.compile(r'^(?:swiper|mfp|mean|nice-select|datepicker|modal|offcanvas|collaps|carousel|dropdown|tooltip|popover|fade|show)')
+# Interaction states are never needed for the first paint.
+INTERACTIVE = re.compile(r':(?:hover|focus|focus-visible|focus-within|active|visited|checked|disabled)\b|::?placeholder|::selection')
+GROUPING_AT_RULES = ('@media', '@supports', '@layer', '@container')
+
+COMMENT = re.compile(r'/\*.*?\*/', re.S)
+STRING = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')''')
+WORD = re.compile(r'[A-Za-z_][\w-]*')
+FUNCTIONAL_PSEUDO = re.compile(r':(?:not|is|where|has|nth-[\w-]+|lang|dir)\([^()]*\)')
+ATTRIBUTE = re.compile(r'\[[^\]]*\]')
+PSEUDO = re.compile(r'::?[\w-]+')
+CLASS_OR_ID = re.compile(r'([.#])(-?[_a-zA-Z][\w-]*)')
+TYPE = re.compile(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)')
+KEYFRAMES = re.compile(r'^@(?:-webkit-)?keyframes\s+([\w-]+)')
+IMPORT = re.compile(r'''@import\s+(?:url\(\s*(?:"[^"]*"|'[^']*'|[^)]*)\s*\)|"[^"]*"|'[^']*')[^;]*;''')
+FONT_FAMILY = re.compile(r'font-family:\s*([^;}]+)')
+HTML_ATTRIBUTE = re.compile(r'\s(class|id)\s*=\s*"([^"]*)"')
+HTML_TAG = re.compile(r'<([a-zA-Z][\w-]*)')
+URL = re.compile(r'url\(\s*(["\']?)([^"\')]+)\1\s*\)')
+
+
+def static_dir():
+    return Path(settings.STATICFILES_DIRS[0])
+
+
+def read(name):
+    return (static_dir() / name).read_text(encoding='utf-8', errors='replace')
+
+
+def split_rules(css):
+    """Top-level ``(prelude, body)`` pairs; bodies of at-rules keep their nested blocks."""
+    rules = []
+    depth = start = 0
+    for index, char in enumerate(css):
+        if char == '{':
+            if depth == 0:
+                brace = index
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                rules.append((css[start:brace].strip(), css[brace + 1:index]))
+                start = index + 1
+    return rules
+
+
+def split_selectors(prelude):
+    """Split a selector list on the commas outside ``:not(...)`` and friends."""
+    selectors, depth, start = [], 0, 0
+    for index, char in enumerate(prelude):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            selectors.append(prelude[start:index].strip())
+            start = index + 1
+    selectors.append(prelude[start:].strip())
+    return selectors
+
+
+def selector_names(selector):
+    """(class and id names, type names) a selector needs to match, ignoring what is inside ``:not()`` etc."""
+    selector = ATTRIBUTE.sub('', FUNCTIONAL_PSEUDO.sub('', selector))
+    names = {name for _, name in CLASS_OR_ID.findall(selector)}
+    types = {name.lower() for name in TYPE.findall(PSEUDO.sub('', CLASS_OR_ID.sub('', selector)))}
+    return names, types
+
+
+def prune(css, keep, imports=True):
+    """
+    Keep only the selectors for which ``keep(selector)`` is true, dropping rules
+    and grouping at-rules left empty. @keyframes and @font-face are kept only
+    while the remaining rules refer to them. @import rules move to the top,
+    where they must be once stylesheets are concatenated, or are dropped with
+    ``imports=False``; @charset is dropped (pages are UTF-8 already).
+    """
+    found = {'imports': [], 'keyframes': [], 'font_faces': []}
+    body = ''.join(_prune(COMMENT.sub('', css), keep, found))
+    kept = found['imports'] if imports else []
+    kept += [rule for name, rule in found['keyframes'] if re.search(rf'\b{re.escape(name)}\b', body)]
+    kept += [rule for family, rule in found['font_faces'] if family in body]
+    return minify(''.join(kept) + body)
+
+
+def _prune(css, keep, found):
+    rules = []
+    for prelude, body in split_rules(css):
+        found['imports'] += IMPORT.findall(prelude)
+        prelude = IMPORT.sub('', prelude).rpartition(';')[2].strip()
+        if keyframe := KEYFRAMES.match(prelude):
+            found['keyframes'].append((keyframe[1], f'{prelude}{{{body}}}'))
+        elif prelude.startswith('@font-face'):
+            family = FONT_FAMILY.search(body)
+            found['font_faces'].append((family[1].strip().strip('"\'') if family else '', f'{prelude}{{{body}}}'))
+        elif prelude.startswith(GROUPING_AT_RULES):
+            inner = _prune(body, keep, found)
+            if inner:
+                rules.append(f'{prelude}{{{"".join(inner)}}}')
+        elif prelude.startswith('@'):
+            rules.append(f'{prelude}{{{body}}}')
+        else:
+            selectors = [selector for selector in split_selectors(prelude) if selector and keep(selector)]
+            if selectors:
+                rules.append(f'{",".join(selectors)}{{{body}}}')
+    return rules
+
+
+def minify(css):
+    """Collapse whitespace outside quoted strings."""
+    parts = STRING.split(css)
+    for index in range(0, len(parts), 2):
+        parts[index] = re.sub(r'\s*([{};,>])\s*', r'\1', re.sub(r'\s+', ' ', parts[index])).replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+def site_names():
+    """Every word in the templates, the project's Python and the JavaScript: the names pages can use."""
+    paths = [path for engine in settings.TEMPLATES for directory in engine.get('DIRS', [])
+             for path in Path(directory).rglob('*.html')]
+    paths += list((static_dir() / 'js').rglob('*.js'))
+    paths += list(Path(__file__).parent.rglob('*.py'))
+    return {word for path in paths for word in WORD.findall(path.read_text(encoding='utf-8', errors='replace'))}
+
+
+def site_keep(names):
+    def keep(selector):
+        needed, _ = selector_names(selector)
+        return all(name in names or SAFELIST.match(name) for name in needed)
+    return keep
+
+
+def fold(html):
+    """The page from ``<body>`` to the end of its first ``FOLD_SECTIONS`` sections."""
+    start = html.find('<body')
+    end = start
+    for _ in range(FOLD_SECTIONS):
+        close = html.find('</section>', end)
+        if close == -1:
+            return html[start:]
+        end = close + len('</section>')
+    return html[start:end]
+
+
+def fold_keep(html):
+    names, tags = set(), {'html', 'body'}
+    for _, value in HTML_ATTRIBUTE.findall(html):
+        names.update(value.split())
+    tags.update(tag.lower() for tag in HTML_TAG.findall(html))
+
+    def keep(selector):
+        if INTERACTIVE.search(selector):
+            return False
+        needed, types = selector_names(selector)
+        return needed <= names and types <= tags
+    return keep
+
+
+def absolute_urls(css, url_for):
+    """Rewrite ``url()``s relative to ``css/`` (where every source stylesheet lives) with ``url_for(path)``."""
+    def rewrite(match):
+        url = match[2].strip()
+        if re.match(r'^(?:[a-z]+:|/|#)', url):
+            return match[0]
+        path = Path('css', url.split('?')[0].split('#')[0])
+        parts = []
+        for part in path.parts:
+            if part == '..':
+                if not parts:
+                    return match[0]
+                parts.pop()
+            elif part != '.':
+                parts.append(part)
+        return f'url({url_for("/".join(parts))})'
+    return URL.sub(rewrite, css)
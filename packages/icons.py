@@ -0,0 +1,112 @@
+"""Icon font subsetting.
+
+``static/css/all.min.css`` is the full Font Awesome 6 Pro stylesheet: ~470 KB
+of CSS and 5 MB of fonts for the few dozen icons the site shows. The
+``build_icon_font`` command writes a pruned copy, ``static/css/icons.min.css``,
+which keeps only the ``fa-*`` rules in use and points every ``@font-face`` at a
+woff2 subset in ``static/webfonts/subset/``, holding just those glyphs. Icons
+in use are the ``fa-*`` classes in templates and project JavaScript, plus the
+admin-editable ``PackageInclusion.icon`` and ``PackageExclusion.icon`` values.
+"""
+import io
+import re
+from pathlib import Path
+
+from django.conf import settings
+
+from .css import SITE_CSS, split_rules
+
+ICON_CLASS = re.compile(r'\bfa-[a-z0-9]+(?:-[a-z0-9]+)*')
+# ".fa-heart:before" or the duotone secondary ".fad.fa-heart:after"
+ICON_SELECTOR = re.compile(r'^(?:\.fa-duotone|\.fad)?\.(fa-[a-z0-9-]+):(?:before|after)$')
+ICON_BODY = re.compile(r'^content:"[^"]*"$')
+CSS_ESCAPE = re.compile(r'\\([0-9a-fA-F]{1,6})')
+FONT_SRC = re.compile(r'src:[^;}]*')
+FONT_URL = re.compile(r'url\(\.\./webfonts/([\w-]+)\.(?:woff2|ttf)\)')
+# Private Use Area, where icon fonts put their glyphs
+PUA = range(0xE000, 0xF900)
+
+SOURCE_CSS = 'css/all.min.css'
+OUTPUT_CSS = 'css/icons.min.css'
+FONTS_DIR = 'webfonts'
+SUBSET_DIR = 'webfonts/subset'
+
+
+def static_dir():
+    return Path(settings.STATICFILES_DIRS[0])
+
+
+def icon_classes():
+    """Every ``fa-*`` class name the site can render."""
+    from .models import PackageExclusion, PackageInclusion
+
+    sources = [path.read_text(errors='replace') for engine in settings.TEMPLATES
+               for directory in engine.get('DIRS', []) for path in Path(directory).rglob('*.html')]
+    sources += [path.read_text(errors='replace') for path in (static_dir() / 'js').glob('*.js')
+                if not path.name.endswith('.min.js')]
+    for model in (PackageInclusion, PackageExclusion):
+        sources.append(model._meta.get_field('icon').default)
+        sources += model.objects.values_list('icon', flat=True).distinct()
+    return {name for source in sources for name in ICON_CLASS.findall(source)}
+
+
+def prune_css(css, classes):
+    """
+    Drop the icon rules for classes not in ``classes`` and point ``@font-face``
+    rules at the woff2 subsets. Returns (css, codepoints the kept rules use).
+    """
+    output = []
+    codepoints = set()
+    for prelude, body in split_rules(css):
+        if prelude == '@font-face':
+            body = FONT_SRC.sub(lambda _: subset_src(body), body, count=1)
+        elif ICON_BODY.match(body):
+            selectors = prelude.split(',')
+            matches = [ICON_SELECTOR.match(selector) for selector in selectors]
+            if all(matches):
+                selectors = [selector for selector, match in zip(selectors, matches) if match[1] in classes]
+                if not selectors:
+                    continue
+                prelude = ','.join(selectors)
+                codepoints.update(int(escape, 16) for escape in CSS_ESCAPE.findall(body))
+        output.append(f'{prelude}{{{body}}}')
+    return ''.join(output), codepoints
+
+
+def subset_src(body):
+    match = FONT_URL.search(body)
+    return f'src:url(../{SUBSET_DIR}/{match[1]}.woff2) format("woff2")' if match else FONT_SRC.search(body)[0]
+
+
+def font_stems(css):
+    return sorted({match[1] for prelude, body in split_rules(css) if prelude == '@font-face'
+                   for match in FONT_URL.finditer(body)})
+
+
+def stylesheet_codepoints():
+    """Icon codepoints the site's own stylesheets use directly (``content: "\\f105"``)."""
+    codepoints = set()
+    for path in (static_dir() / 'css').glob('*.css'):
+        # Not this stylesheet's input or output, nor the bundle build_css makes from the output
+        if path.name in (Path(SOURCE_CSS).name, Path(OUTPUT_CSS).name, Path(SITE_CSS).name):
+            continue
+        codepoints.update(cp for cp in (int(e, 16) for e in CSS_ESCAPE.findall(path.read_text(errors='replace'))) if cp in PUA)
+    return codepoints
+
+
+def subset_font(source, codepoints):
+    """woff2 bytes of ``source`` reduced to ``codepoints`` (plus the ligatures duotone icons draw with)."""
+    from fontTools import subset
+
+    options = subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = ['*']
+    options.name_IDs = ['*']
+    options.notdef_outline = True
+    font = subset.load_font(source, options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    buffer = io.BytesIO()
+    subset.save_font(font, buffer, options)
+    return buffer.getvalue()
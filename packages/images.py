@@ -0,0 +1,164 @@
+"""Responsive image derivatives and persisted image metadata.
+
+Every uploaded image gets resized WebP and JPEG copies at ``DERIVATIVE_WIDTHS``,
+saved next to the original in the same storage under a predictable name
+(``packages/munnar.jpg`` -> ``packages/munnar.w640.webp``). Storages that set
+``serves_derivatives`` (Cloudinary, see ``storage_cloudinary.py``) resize on
+request instead, so nothing is written for them. The same pass
+records the image's dimensions, dominant colour and a tiny blurred placeholder
+in the owning row's ``image_metadata``, so templates can emit ``srcset``,
+``width``/``height`` and a blur-up background without touching storage; see
+the ``responsive_attrs`` tag in ``templatetags/images.py``.
+"""
+import base64
+import io
+import os
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.db import models
+from PIL import Image, ImageOps
+
+DERIVATIVE_WIDTHS = (320, 640, 960, 1440)
+DERIVATIVE_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+# Longest side of the inline placeholder; the browser scales and blurs it.
+PLACEHOLDER_SIZE = 16
+
+
+def derivative_name(name, width, fmt):
+    root, _ = os.path.splitext(name)
+    return f'{root}.w{width}.{"jpg" if fmt == "jpeg" else fmt}'
+
+
+def image_fields(model):
+    return [field.name for field in model._meta.get_fields() if isinstance(field, models.ImageField)]
+
+
+def models_with_images():
+    return [model for model in apps.get_app_config('packages').get_models() if image_fields(model)]
+
+
+def _open(field_file):
+    with field_file.storage.open(field_file.name, 'rb') as f:
+        image = Image.open(f)
+        image.load()
+    return ImageOps.exif_transpose(image)
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def _flatten(image):
+    """JPEG has no alpha: composite transparent images onto white."""
+    if _has_alpha(image):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def write_derivatives(field_file, original):
+    """
+    Write every width/format derivative of ``original`` next to ``field_file`` and
+    return their names. Images are never upscaled: widths above the original reuse its size.
+    """
+    storage = field_file.storage
+    variants = {
+        'webp': original if original.mode in ('RGB', 'RGBA') else original.convert('RGBA' if _has_alpha(original) else 'RGB'),
+        'jpeg': _flatten(original),
+    }
+    names = []
+    for width in DERIVATIVE_WIDTHS:
+        for fmt, options in DERIVATIVE_FORMATS.items():
+            image = variants[fmt]
+            if image.width > width:
+                image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, **options)
+            name = derivative_name(field_file.name, width, fmt)
+            # Names must stay predictable, so replace rather than let storage pick a new one
+            if storage.exists(name):
+                storage.delete(name)
+            names.append(storage.save(name, ContentFile(buffer.getvalue())))
+    return names
+
+
+def dominant_color(image):
+    """Most common colour after reducing the image to a small palette, as ``#rrggbb``."""
+    small = _flatten(image).resize((64, 64))
+    paletted = small.quantize(colors=5)
+    _, index = max(paletted.getcolors())
+    r, g, b = paletted.getpalette()[index * 3:index * 3 + 3]
+    return f'#{r:02x}{g:02x}{b:02x}'
+
+
+def placeholder(image):
+    """A ``PLACEHOLDER_SIZE``px WebP data URI (a few hundred bytes) for blur-up loading."""
+    small = _flatten(image)
+    small.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    buffer = io.BytesIO()
+    small.save(buffer, 'WEBP', quality=40)
+    return 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+def process_image(field_file, derivatives=True):
+    """Open ``field_file`` once: write its derivatives and return its metadata entry."""
+    original = _open(field_file)
+    if derivatives and not getattr(field_file.storage, 'serves_derivatives', False):
+        write_derivatives(field_file, original)
+    return {
+        'name': field_file.name,
+        'width': original.width,
+        'height': original.height,
+        'color': dominant_color(original),
+        'placeholder': placeholder(original),
+        'alpha': _has_alpha(original),
+    }
+
+
+def save_image_metadata(instance, entries):
+    """Merge ``{field name: metadata}`` into the row's image_metadata without a full save()."""
+    instance.image_metadata = {**instance.image_metadata, **entries}
+    type(instance)._base_manager.filter(pk=instance.pk).update(image_metadata=instance.image_metadata)
+
+
+def image_info(field_file):
+    """The stored metadata for ``field_file``, or None if it was never processed or the file has changed."""
+    if not field_file:
+        return None
+    info = getattr(field_file.instance, 'image_metadata', {}).get(field_file.field.name)
+    return info if info and info.get('name') == field_file.name else None
+
+
+def srcset_widths(field_file):
+    """(derivative width, descriptor width) pairs, trimmed to the original's width when it is known."""
+    info = image_info(field_file)
+    if info is None:
+        return [(width, width) for width in DERIVATIVE_WIDTHS]
+    pairs = [(width, width) for width in DERIVATIVE_WIDTHS if width < info['width']]
+    larger = [width for width in DERIVATIVE_WIDTHS if width >= info['width']]
+    if larger:
+        # The first derivative at or past the original is the original's size
+        pairs.append((larger[0], info['width']))
+    return pairs
+
+
+def derivative_url(storage, name, width, fmt):
+    """URL of one derivative; storages may build it themselves (memoised, or transformed on the fly)."""
+    if hasattr(storage, 'derivative_url'):
+        return storage.derivative_url(name, width, fmt)
+    return storage.url(derivative_name(name, width, fmt))
+
+
+def srcset(field_file, fmt='webp'):
+    if not field_file:
+        return ''
+    return ', '.join(
+        f'{derivative_url(field_file.storage, field_file.name, width, fmt)} {descriptor}w'
+        for width, descriptor in srcset_widths(field_file)
+    )
@@ -0,0 +1,142 @@
+"""Durable email outbox.
+
+Views render their emails into ``OutboundEmail`` rows in the same transaction
+as the data they describe, and return without touching SMTP. The
+``run_mail_worker`` command drains due rows in batches over a single backend
+connection, retrying failures with exponential backoff.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+MAIL_MAX_ATTEMPTS = getattr(settings, 'MAIL_MAX_ATTEMPTS', 6)
+# Retry n waits MAIL_RETRY_BASE_DELAY * 2**(n-1) seconds, capped at MAIL_RETRY_MAX_DELAY.
+MAIL_RETRY_BASE_DELAY = getattr(settings, 'MAIL_RETRY_BASE_DELAY', 60)
+MAIL_RETRY_MAX_DELAY = getattr(settings, 'MAIL_RETRY_MAX_DELAY', 60 * 60)
+# A worker that dies mid-batch releases its rows after this long.
+MAIL_CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+def queue_email(subject, template, context, to, contact=None):
+    """Render ``template`` and queue it as an HTML email; sent later by run_mail_worker."""
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=render_to_string(template, context),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+        contact=contact,
+    )
+
+
+def queue_contact_emails(contact):
+    """The admin notification and the customer confirmation for a contact form submission."""
+    admin_email = getattr(settings, 'ADMIN_EMAIL', 'admin@natureholidays.com')
+    queue_email(
+        f'New Contact Form Submission from {contact.name}',
+        'emails/contact_notification.html', {'contact': contact}, [admin_email], contact=contact,
+    )
+    queue_email(
+        'Thank you for contacting Nature Holidays',
+        'emails/contact_confirmation.html', {'contact': contact}, [contact.email], contact=contact,
+    )
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(MAIL_RETRY_BASE_DELAY * 2 ** (attempts - 1), MAIL_RETRY_MAX_DELAY))
+
+
+def claim_due_emails(batch_size):
+    """
+    Mark up to ``batch_size`` due rows as sending and return them. Rows locked by
+    a concurrent worker are skipped, so several workers can drain one outbox.
+
+    A row still sending once its claim lapsed took down or hung the worker
+    that had it: that counts as an attempt, and past ``MAIL_MAX_ATTEMPTS`` the
+    row fails instead of being claimed again.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(Q(status='pending') | Q(status='sending'), next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'pk')[:batch_size]
+        )
+        abandoned = [email for email in emails if email.status == 'sending']
+        if abandoned:
+            error = 'Claim expired: the worker sending this email stopped'
+            OutboundEmail.objects.filter(pk__in=[email.pk for email in abandoned]).update(
+                attempts=F('attempts') + 1, last_error=error,
+            )
+            for email in abandoned:
+                email.attempts += 1
+                email.last_error = error
+            exhausted = [email for email in abandoned if email.attempts >= MAIL_MAX_ATTEMPTS]
+            OutboundEmail.objects.filter(pk__in=[email.pk for email in exhausted]).update(status='failed')
+            for email in exhausted:
+                logger.error('Giving up on email %s to %s after %d attempts: %s', email.pk, email.to, email.attempts, error)
+            emails = [email for email in emails if email not in exhausted]
+        OutboundEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            status='sending', next_attempt_at=now + MAIL_CLAIM_TIMEOUT,
+        )
+    return emails
+
+
+def send_due_emails(batch_size=50):
+    """Send one batch of due emails over a single connection; returns (sent, failed) counts."""
+    emails = claim_due_emails(batch_size)
+    if not emails:
+        return 0, 0
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        # Nothing in the batch can go out; back off all of it
+        for email in emails:
+            _record_failure(email, exc)
+        return 0, len(emails)
+    try:
+        for email in emails:
+            message = EmailMessage(
+                subject=email.subject, body=email.body, from_email=email.from_email,
+                to=email.to, connection=connection,
+            )
+            message.content_subtype = email.content_subtype
+            try:
+                message.send()
+            except Exception as exc:
+                _record_failure(email, exc)
+                failed += 1
+            else:
+                email.status = 'sent'
+                email.attempts += 1
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                email.save(update_fields=['status', 'attempts', 'sent_at', 'last_error'])
+                sent += 1
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def _record_failure(email, exc):
+    email.attempts += 1
+    email.last_error = f'{type(exc).__name__}: {exc}'
+    if email.attempts >= MAIL_MAX_ATTEMPTS:
+        email.status = 'failed'
+        logger.error('Giving up on email %s to %s after %d attempts: %s', email.pk, email.to, email.attempts, exc)
+    else:
+        email.status = 'pending'
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+        logger.warning('Email %s to %s failed (attempt %d), retrying: %s', email.pk, email.to, email.attempts, exc)
+    email.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at'])
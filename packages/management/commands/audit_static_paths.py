@@ -0,0 +1,91 @@
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+from django.template.base import tag_re
+
+LOAD_STATIC = re.compile(r'{%\s*load\s[^%]*\bstatic\b')
+EXTENDS = re.compile(r'{%\s*extends\s.*?%}\n?')
+
+
+class Command(BaseCommand):
+    help = (
+        'Report hard-coded static paths in templates. They bypass the hashed file names, '
+        'so browsers can only cache them briefly; --fix rewrites them to {% static %}'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Rewrite literal paths to existing files as {% static %}')
+        parser.add_argument('--check', action='store_true', help='Exit with an error if any remain (for CI)')
+
+    def handle(self, *args, **options):
+        prefix = re.escape(settings.STATIC_URL.lstrip('/'))
+        # "/static/x.css", and the page-relative "static/x.css" inside a quoted attribute or url()
+        static_path = re.compile(rf'(?:(?<![\w/])/|(?<=["\'(])){prefix}(?P<path>[\w./-]*)')
+        remaining = fixed = 0
+        for template in self.templates():
+            source = template.read_text()
+            findings, rewritten = self.audit(source, static_path)
+            label = os.path.relpath(template, settings.BASE_DIR)
+            for lineno, path, problem in findings:
+                if options['fix'] and not problem:
+                    fixed += 1
+                    continue
+                remaining += 1
+                note = f'  ({problem})' if problem else ''
+                self.stdout.write(f'{label}:{lineno}  {settings.STATIC_URL}{path}{note}')
+            if options['fix'] and rewritten != source:
+                template.write_text(self.ensure_load_static(rewritten))
+
+        if fixed:
+            self.stdout.write(self.style.SUCCESS(f'Rewrote {fixed} path(s) to {{% static %}}.'))
+        if remaining:
+            message = f'{remaining} hard-coded static path(s).'
+            if options['check']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('No hard-coded static paths.'))
+
+    def templates(self):
+        for engine in settings.TEMPLATES:
+            for directory in engine.get('DIRS', []):
+                yield from sorted(Path(directory).rglob('*.html'))
+
+    def audit(self, source, static_path):
+        """
+        ([(line, path, problem)], rewritten source). Only template text is
+        searched, never the inside of tags or variables; problem is '' for a
+        path that can be rewritten.
+        """
+        pieces = tag_re.split(source)
+        lineno = 1
+        findings = []
+        for index, piece in enumerate(pieces):
+            if index % 2 == 0:
+                def rewrite(match):
+                    path = match['path']
+                    line = lineno + piece.count('\n', 0, match.start())
+                    if path and finders.find(path):
+                        findings.append((line, path, ''))
+                        return f"{{% static '{path}' %}}"
+                    if not path or (match.end() == len(piece) and index + 1 < len(pieces)):
+                        # Path continues into a {{ variable }} or {% tag %}
+                        findings.append((line, path, 'built from template variables; fix by hand'))
+                    else:
+                        findings.append((line, path, 'file not found in static/'))
+                    return match[0]
+
+                pieces[index] = static_path.sub(rewrite, piece)
+            lineno += piece.count('\n')
+        return findings, ''.join(pieces)
+
+    def ensure_load_static(self, source):
+        if LOAD_STATIC.search(source):
+            return source
+        extends = EXTENDS.search(source)
+        position = extends.end() if extends else 0
+        return source[:position] + '{% load static %}\n' + source[position:]
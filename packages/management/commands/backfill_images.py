@@ -0,0 +1,60 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+
+from packages.caching import bump_content_version
+from packages.images import image_fields, image_info, models_with_images, process_image, save_image_metadata
+from packages.pagecache import mark_changed
+
+# Images submitted per worker before waiting for one to finish, so a large
+# backlog never holds more than a few batches of rows and results in memory.
+IN_FLIGHT_PER_WORKER = 4
+
+
+class Command(BaseCommand):
+    help = 'Record metadata (and write responsive derivatives) for images uploaded before either existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Images processed concurrently')
+        parser.add_argument('--force', action='store_true', help='Reprocess images that already have metadata')
+        parser.add_argument('--no-derivatives', action='store_true', help='Only record metadata')
+
+    def handle(self, *args, **options):
+        derivatives = not options['no_derivatives']
+        processed = failed = 0
+        # Storage reads dominate and Pillow releases the GIL while decoding and resizing,
+        # so threads parallelise well. Rows are written from this thread only.
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            self.stdout.write(f'Processing images with {options["workers"]} workers')
+            futures = {}
+            pending = self.pending(options['force'])
+            while True:
+                for instance, name in pending:
+                    futures[executor.submit(process_image, getattr(instance, name), derivatives)] = (instance, name)
+                    if len(futures) >= options['workers'] * IN_FLIGHT_PER_WORKER:
+                        break
+                if not futures:
+                    break
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    instance, name = futures.pop(future)
+                    try:
+                        save_image_metadata(instance, {name: future.result()})
+                    except Exception as exc:
+                        failed += 1
+                        self.stderr.write(f'{type(instance).__name__} {instance.pk} {name}: {exc}')
+                    else:
+                        processed += 1
+        if processed:
+            bump_content_version()
+            mark_changed(*models_with_images())
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} image(s), {failed} failed'))
+
+    def pending(self, force):
+        for model in models_with_images():
+            fields = image_fields(model)
+            for instance in model._base_manager.only('pk', 'image_metadata', *fields).iterator(chunk_size=500):
+                for name in fields:
+                    field_file = getattr(instance, name)
+                    if field_file and (force or image_info(field_file) is None):
+                        yield instance, name
@@ -0,0 +1,70 @@
+import gzip
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from packages.css import (
+    CRITICAL_DIR, PAGE_STYLESHEETS, SITE_CSS, SITE_STYLESHEETS, fold, fold_keep, prune, read, site_keep,
+    site_names, static_dir,
+)
+from packages.models import Package
+
+
+def gzipped(css):
+    return len(gzip.compress(css.encode(), 9))
+
+
+class Command(BaseCommand):
+    help = (
+        'Prune the site stylesheets to the selectors templates and scripts use (css/site.min.css) '
+        'and extract the above-the-fold rules of each page type (css/critical/<page>.css)'
+    )
+
+    def handle(self, *args, **options):
+        root = static_dir()
+        keep = site_keep(site_names())
+        sources = {name: read(name) for name in SITE_STYLESHEETS}
+        self.stdout.write(self.style.MIGRATE_HEADING('Site stylesheets (bytes)'))
+        for name, css in sources.items():
+            self.stdout.write(f'  {name:<36} {len(css.encode()):>9} -> {len(prune(css, keep).encode()):>8}')
+
+        bundle = '\n'.join(sources.values())
+        site = prune(bundle, keep)
+        (root / SITE_CSS).write_text(f'/* Generated by `manage.py build_css`; do not edit. */\n{site}\n')
+        self.stdout.write(
+            f'  {SITE_CSS:<36} {len(bundle.encode()):>9} -> {len(site.encode()):>8}   '
+            f'gzip {gzipped(bundle):>7} -> {gzipped(site):>6}'
+        )
+
+        (root / CRITICAL_DIR).mkdir(parents=True, exist_ok=True)
+        self.stdout.write(self.style.MIGRATE_HEADING('Render-blocking CSS per page type (gzip bytes)'))
+        for page, path in self.pages():
+            if path is None:
+                self.stdout.write(self.style.WARNING(f'  {page:<8} skipped: no page to render'))
+                continue
+            response = self.client().get(path, secure=True)
+            if response.status_code != 200:
+                self.stdout.write(self.style.WARNING(f'  {page:<8} skipped: {path} returned {response.status_code}'))
+                continue
+            extras = [read(name) for name in PAGE_STYLESHEETS[page]]
+            critical = prune('\n'.join([site, *extras]), fold_keep(fold(response.content.decode())), imports=False)
+            (root / CRITICAL_DIR / f'{page}.css').write_text(critical)
+            before = gzipped(bundle) + sum(gzipped(css) for css in extras)
+            self.stdout.write(
+                f'  {page:<8} {path:<22} before {before:>7} in {len(sources) + len(extras)} request(s)   '
+                f'after {gzipped(critical):>6} inline ({len(critical.encode())} raw)'
+            )
+
+    def client(self):
+        host = next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost')
+        return Client(HTTP_HOST=host)
+
+    def pages(self):
+        """(page type, path of a page of that type, or None)"""
+        package = Package.objects.filter(is_active=True).order_by('pk').first()
+        yield 'home', reverse('packages:home')
+        yield 'list', reverse('packages:package_list')
+        yield 'detail', reverse('packages:package_detail', args=[package.pk]) if package else None
+        yield 'blog', reverse('packages:blog')
@@ -0,0 +1,54 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+
+from packages.icons import (
+    FONTS_DIR, OUTPUT_CSS, SOURCE_CSS, SUBSET_DIR, font_stems, icon_classes, prune_css, static_dir,
+    stylesheet_codepoints, subset_font,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Subset the Font Awesome fonts to the icons used by templates, project JS and '
+        'package inclusion/exclusion icons, writing woff2 files and css/icons.min.css'
+    )
+
+    def handle(self, *args, **options):
+        try:
+            import fontTools  # noqa: F401
+        except ImportError:
+            raise CommandError('build_icon_font needs fontTools and Brotli: pip install fonttools brotli')
+
+        root = static_dir()
+        source_css = (root / SOURCE_CSS).read_text()
+        classes = icon_classes()
+        css, codepoints = prune_css(source_css, classes)
+        codepoints |= stylesheet_codepoints()
+        unknown = sorted(name for name in classes if not re.search(rf'\.{re.escape(name)}(?![\w-])', source_css))
+        if unknown:
+            self.stdout.write(self.style.WARNING(f'Not in {SOURCE_CSS} (typo or missing icon?): {", ".join(unknown)}'))
+
+        subset_dir = root / SUBSET_DIR
+        subset_dir.mkdir(parents=True, exist_ok=True)
+        stems = font_stems(source_css)
+        for stale in subset_dir.glob('*.woff2'):
+            if stale.stem not in stems:
+                stale.unlink()
+        before = (root / SOURCE_CSS).stat().st_size
+        after = 0
+        for stem in stems:
+            # The TrueType originals: some of the shipped woff2 files do not decode
+            source = root / FONTS_DIR / f'{stem}.ttf'
+            data = subset_font(source, codepoints)
+            (subset_dir / f'{stem}.woff2').write_bytes(data)
+            before += (root / FONTS_DIR / f'{stem}.woff2').stat().st_size
+            after += len(data)
+
+        css = f'/* Generated by `manage.py build_icon_font` from {SOURCE_CSS.split("/")[-1]}; do not edit. */\n{css}'
+        (root / OUTPUT_CSS).write_text(css)
+        after += len(css.encode())
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(classes)} fa-* classes, {len(codepoints)} glyphs, {len(stems)} fonts: '
+            f'{before / 1024:.0f} KiB -> {after / 1024:.0f} KiB (stylesheet + woff2)'
+        ))
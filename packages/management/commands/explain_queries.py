@@ -0,0 +1,93 @@
+import re
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from packages.models import Blog, Category, Package
+from packages.pagination import KeysetPaginator
+from packages.search import PACKAGE_LIST_ORDERING, filter_packages
+from packages.views import BLOG_LIST_ORDERING
+
+# Plan lines that read a whole table instead of an index.
+FULL_SCAN = re.compile(r'Seq Scan on (\w+)|\bSCAN (\w+)(?! USING)(?!.*INDEX)')
+
+
+class Command(BaseCommand):
+    help = 'Print the EXPLAIN plan of each public view query, flagging full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('labels', nargs='*', help='Only explain queries whose label contains one of these')
+        parser.add_argument('--analyze', action='store_true', help='Run the queries (EXPLAIN ANALYZE, Postgres only)')
+
+    def handle(self, *args, **options):
+        options_for_explain = {}
+        if options['analyze']:
+            if connection.vendor != 'postgresql':
+                self.stderr.write('--analyze is only supported on Postgres; showing estimated plans.')
+            else:
+                options_for_explain = {'analyze': True, 'buffers': True}
+
+        scans = 0
+        for label, queryset in self.view_querysets():
+            if options['labels'] and not any(name in label for name in options['labels']):
+                continue
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            for line in queryset.explain(**options_for_explain).splitlines():
+                match = FULL_SCAN.search(line)
+                if match and (match.group(1) or match.group(2)).startswith('packages_'):
+                    scans += 1
+                    self.stdout.write(self.style.WARNING(f'  {line}'))
+                else:
+                    self.stdout.write(f'  {line}')
+            self.stdout.write('')
+
+        if scans:
+            self.stdout.write(self.style.WARNING(
+                f'{scans} full table scan(s). Small or freshly created tables are often scanned '
+                'regardless; run ANALYZE and re-check against production-sized data (generate_catalog).'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('No full table scans.'))
+
+    def view_querysets(self):
+        """(label, queryset) for the queries each public view runs, with sample filter values from the database."""
+        category = Category.objects.filter(is_active=True).first()
+        package = Package.objects.filter(is_active=True).first()
+        blog = Blog.objects.filter(status='published', is_active=True).first()
+
+        yield 'home: featured packages', Package.objects.filter(is_active=True, is_featured=True)[:3]
+        yield 'home: popular packages', Package.objects.filter(is_active=True, is_popular=True)[:8]
+
+        yield 'package_list: page 1', filter_packages({})[:8]
+        if category:
+            yield 'package_list: category', filter_packages({'category': category.pk})[:8]
+        yield 'package_list: type', filter_packages({'type': 'family'})[:8]
+        if package:
+            price_range = {'min_price': package.price, 'max_price': package.price * 2}
+            yield 'package_list: price range', filter_packages(price_range)[:8]
+            paginator = KeysetPaginator(filter_packages({}, ordered=False), 8, PACKAGE_LIST_ORDERING)
+            yield 'package_list: keyset page', self.seek(paginator, package)
+
+            yield 'package_detail: related packages', Package.objects.filter(
+                category=package.category_id, is_active=True
+            ).exclude(id=package.pk)[:3]
+            yield 'package_detail: itinerary', package.itineraries.filter(is_active=True)
+            yield 'package_detail: inclusions', package.inclusions.filter(is_active=True)
+
+        published = Blog.objects.filter(status='published', is_active=True)
+        yield 'blog: page 1', published[:6]
+        if blog:
+            yield 'blog: category', published.filter(category__slug=blog.category.slug)[:6]
+            paginator = KeysetPaginator(published, 6, BLOG_LIST_ORDERING, nullable=['published_date'])
+            yield 'blog: keyset page', self.seek(paginator, blog)
+
+            yield 'blog_detail: related posts', published.filter(category=blog.category_id).exclude(id=blog.pk)[:3]
+            yield 'blog_detail: comments', blog.comments.filter(is_active=True)
+
+    def seek(self, paginator, obj):
+        """The query KeysetPaginator runs for the page after ``obj``."""
+        values = [getattr(obj, 'pk' if name == 'pk' else name) for name in paginator.ordering]
+        return (
+            paginator.queryset.order_by(*paginator.order_expressions(True))
+            .filter(paginator.seek_q(values, True))[:paginator.per_page + 1]
+        )
@@ -0,0 +1,266 @@
+import io
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from PIL import Image
+
+from packages.caching import bump_content_version
+from packages.models import (
+    Category, Offer, Package, PackageImage, Itinerary, PackageInclusion, PackageExclusion,
+    BlogCategory, BlogTag, Blog, BlogComment, Contact,
+)
+from packages.pagecache import mark_changed
+from packages.suggest import bump_suggest_version
+
+
+PLACES = [
+    'Munnar', 'Alleppey', 'Kumarakom', 'Thekkady', 'Wayanad', 'Kovalam', 'Varkala', 'Kochi',
+    'Ooty', 'Coorg', 'Goa', 'Jaipur', 'Udaipur', 'Agra', 'Delhi', 'Amritsar', 'Manali', 'Shimla',
+    'Leh', 'Srinagar', 'Andaman', 'Darjeeling', 'Gangtok', 'Rishikesh', 'Varanasi', 'Hampi',
+    'Mysore', 'Pondicherry', 'Bangkok', 'Phuket', 'Bali', 'Dubai', 'Singapore', 'Maldives',
+    'Kathmandu', 'Paro', 'Colombo', 'Kandy',
+]
+REGIONS = ['Kerala', 'Karnataka', 'Tamil Nadu', 'Rajasthan', 'Himachal', 'Kashmir', 'Goa', 'Thailand', 'Indonesia', 'UAE']
+THEMES = ['Backwater', 'Hill Station', 'Heritage', 'Wildlife', 'Beach', 'Honeymoon', 'Pilgrimage', 'Adventure', 'Ayurveda', 'Family']
+WORDS = (
+    'misty hills tea estates houseboat backwaters spice gardens sunrise sunset temples forts palaces '
+    'beaches lagoons waterfalls trekking wildlife safari cuisine culture heritage villages markets '
+    'cruise relaxing comfortable guided transfers sightseeing evenings slow mornings family couples'
+).split()
+IMAGE_COLOURS = ['#2e7d32', '#0277bd', '#f9a825', '#6a1b9a', '#c62828', '#00838f', '#4e342e', '#546e7a']
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a synthetic catalog for load testing with chunked bulk_create. '
+        'Example production-scale run: --categories 50 --packages 100000 --itineraries 1000000 '
+        '--inclusions 1000000 --exclusions 1000000 --blogs 50000 --comments 200000 --contacts 200000'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=50, help='Package categories to create.')
+        parser.add_argument('--offers', type=int, default=20, help='Offers to create.')
+        parser.add_argument('--packages', type=int, default=5000, help='Packages to create.')
+        parser.add_argument('--gallery-images', type=int, default=5000, help='PackageImage rows to create.')
+        parser.add_argument('--itineraries', type=int, default=20000, help='Itinerary rows, spread over the new packages.')
+        parser.add_argument('--inclusions', type=int, default=20000, help='PackageInclusion rows.')
+        parser.add_argument('--exclusions', type=int, default=10000, help='PackageExclusion rows.')
+        parser.add_argument('--blog-categories', type=int, default=20, help='Blog categories to create.')
+        parser.add_argument('--tags', type=int, default=200, help='Blog tags to create.')
+        parser.add_argument('--blogs', type=int, default=1000, help='Published blog posts to create.')
+        parser.add_argument('--tags-per-blog', type=int, default=3, help='Tags attached to each new blog post.')
+        parser.add_argument('--comments', type=int, default=5000, help='Blog comments to create.')
+        parser.add_argument('--contacts', type=int, default=5000, help='Contact enquiries to create.')
+        parser.add_argument('--placeholders', type=int, default=8, help='Distinct placeholder images to generate.')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows per bulk_create batch.')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed, for repeatable catalogs.')
+
+    def handle(self, *args, **options):
+        if options['packages'] and not options['categories'] and not Category.objects.exists():
+            raise CommandError('--categories 0 needs existing categories')
+        self.rng = random.Random(options['seed'])
+        self.chunk_size = options['chunk_size']
+        self.now = timezone.now()
+        started = time.monotonic()
+
+        images = self.create_placeholders(options['placeholders'])
+
+        category_ids = self.bulk('categories', Category, (
+            Category(
+                name=f'{THEMES[i % len(THEMES)]} Holidays {i + 1}',
+                description=self.sentence(20),
+                cover_image=self.rng.choice(images['categories']),
+            )
+            for i in range(options['categories'])
+        ))
+        if not category_ids:
+            # --categories 0: spread the new packages over the existing categories
+            category_ids = list(Category.objects.values_list('pk', flat=True))
+        offer_ids = self.bulk('offers', Offer, (
+            Offer(
+                title=f'{self.rng.choice(THEMES)} Offer {i + 1}',
+                description=self.sentence(18),
+                discount_percentage=Decimal(self.rng.choice([5, 10, 12, 15, 20, 25])),
+                valid_from=self.now - timedelta(days=self.rng.randint(0, 30)),
+                valid_to=self.now + timedelta(days=self.rng.randint(10, 120)),
+                is_seasonal=self.rng.random() < 0.3,
+                season_name=self.rng.choice(['Onam', 'Christmas', 'New Year', '']),
+            )
+            for i in range(options['offers'])
+        ))
+        package_ids = self.bulk('packages', Package, (
+            self.make_package(i, category_ids, offer_ids, images['packages'])
+            for i in range(options['packages'])
+        ))
+        Package.objects.filter(search_vector__isnull=True).update_search_vector()
+
+        if package_ids:
+            self.bulk('gallery images', PackageImage, (
+                PackageImage(package_id=self.rng.choice(package_ids), image=self.rng.choice(images['packages']))
+                for _ in range(options['gallery_images'])
+            ), fetch_ids=False)
+            # Round-robin over packages so (package, day_number) stays unique.
+            count = len(package_ids)
+            self.bulk('itineraries', Itinerary, (
+                Itinerary(
+                    package_id=package_ids[i % count],
+                    day_number=i // count + 1,
+                    title=f'Day {i // count + 1}: {self.rng.choice(PLACES)}',
+                    description=self.sentence(30),
+                )
+                for i in range(options['itineraries'])
+            ), fetch_ids=False)
+            self.bulk('inclusions', PackageInclusion, (
+                PackageInclusion(
+                    package_id=package_ids[i % count],
+                    title=self.sentence(4).capitalize(),
+                    description=self.sentence(10),
+                    icon=self.rng.choice(['fa-check', 'fa-hotel', 'fa-utensils', 'fa-car', 'fa-ticket']),
+                    is_highlighted=self.rng.random() < 0.2,
+                    order=i // count,
+                )
+                for i in range(options['inclusions'])
+            ), fetch_ids=False)
+            self.bulk('exclusions', PackageExclusion, (
+                PackageExclusion(
+                    package_id=package_ids[i % count],
+                    title=self.sentence(4).capitalize(),
+                    description=self.sentence(10),
+                    order=i // count,
+                )
+                for i in range(options['exclusions'])
+            ), fetch_ids=False)
+
+        # Slugs are unique; number them past anything a previous run created.
+        category_base = self.max_pk(BlogCategory)
+        blog_category_ids = self.bulk('blog categories', BlogCategory, (
+            BlogCategory(name=f'{THEMES[i % len(THEMES)]} Stories {i + 1}', slug=f'gen-category-{category_base + i}')
+            for i in range(options['blog_categories'])
+        ))
+        tag_base = self.max_pk(BlogTag)
+        tag_ids = self.bulk('tags', BlogTag, (
+            BlogTag(name=f'{self.rng.choice(PLACES)} {i + 1}', slug=f'gen-tag-{tag_base + i}')
+            for i in range(options['tags'])
+        ))
+        blog_base = self.max_pk(Blog)
+        blog_ids = []
+        if blog_category_ids:
+            blog_ids = self.bulk('blogs', Blog, (
+                Blog(
+                    title=f'{self.rng.choice(THEMES)} in {self.rng.choice(PLACES)} #{i + 1}',
+                    slug=f'gen-blog-{blog_base + i}',
+                    excerpt=self.sentence(25),
+                    content='\n\n'.join(self.sentence(80) for _ in range(4)),
+                    featured_image=self.rng.choice(images['blog']),
+                    category_id=self.rng.choice(blog_category_ids),
+                    status='published',
+                    published_date=self.now - timedelta(minutes=self.rng.randint(0, 3 * 365 * 24 * 60)),
+                    is_featured=self.rng.random() < 0.05,
+                )
+                for i in range(options['blogs'])
+            ))
+        if blog_ids and tag_ids:
+            per_blog = min(options['tags_per_blog'], len(tag_ids))
+            self.bulk('blog tag links', Blog.tags.through, (
+                Blog.tags.through(blog_id=blog_id, blogtag_id=tag_id)
+                for blog_id in blog_ids
+                for tag_id in self.rng.sample(tag_ids, per_blog)
+            ), fetch_ids=False)
+        if blog_ids:
+            self.bulk('comments', BlogComment, (
+                BlogComment(
+                    blog_id=self.rng.choice(blog_ids),
+                    name=f'Traveller {i + 1}',
+                    email=f'traveller{i + 1}@example.com',
+                    comment=self.sentence(25),
+                )
+                for i in range(options['comments'])
+            ), fetch_ids=False)
+
+        services = [code for code, _ in Contact.SERVICE_CHOICES]
+        self.bulk('contacts', Contact, (
+            Contact(
+                name=f'Guest {i + 1}',
+                email=f'guest{i + 1}@example.com',
+                phone=f'+91 9{self.rng.randint(100000000, 999999999)}',
+                service=self.rng.choice(services),
+                message=self.sentence(40),
+                is_read=self.rng.random() < 0.7,
+            )
+            for i in range(options['contacts'])
+        ), fetch_ids=False)
+
+        # bulk_create skips post_save, so invalidate cached content explicitly.
+        bump_content_version()
+        bump_suggest_version()
+        mark_changed(Category, Offer, Package, PackageImage, Itinerary, PackageInclusion, PackageExclusion,
+                     BlogCategory, BlogTag, Blog, BlogComment)
+        self.stdout.write(self.style.SUCCESS(f'Catalog generated in {time.monotonic() - started:.1f}s'))
+
+    def bulk(self, label, model, rows, fetch_ids=True):
+        """bulk_create ``rows`` in chunks and return the new primary keys."""
+        before = self.max_pk(model) if fetch_ids else 0
+        started = time.monotonic()
+        created = 0
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            with transaction.atomic():
+                model.objects.bulk_create(chunk, batch_size=self.chunk_size)
+            created += len(chunk)
+        self.stdout.write(f'  {label}: {created} rows in {time.monotonic() - started:.1f}s')
+        if not fetch_ids:
+            return []
+        return list(model.objects.filter(pk__gt=before).order_by('pk').values_list('pk', flat=True))
+
+    def max_pk(self, model):
+        return model.objects.aggregate(m=Max('pk'))['m'] or 0
+
+    def make_package(self, i, category_ids, offer_ids, images):
+        place = self.rng.choice(PLACES)
+        days = self.rng.randint(2, 12)
+        return Package(
+            name=f'{place} {self.rng.choice(THEMES)} Escape {i + 1}',
+            description=self.sentence(60),
+            category_id=self.rng.choice(category_ids),
+            offer_id=self.rng.choice(offer_ids) if offer_ids and self.rng.random() < 0.3 else None,
+            package_type=self.rng.choice(Package.PACKAGE_TYPE_CHOICES)[0],
+            price=Decimal(self.rng.randrange(5000, 250000, 500)),
+            duration=f'{days} Days, {days - 1} Nights',
+            location=f'{place}, {self.rng.choice(REGIONS)}',
+            destinations=', '.join(self.rng.sample(PLACES, self.rng.randint(1, 4))),
+            max_group_size=self.rng.choice([None, 10, 20, 40]),
+            min_age=self.rng.choice([None, 5, 12, 18]),
+            cover_image=self.rng.choice(images),
+            is_featured=self.rng.random() < 0.05,
+            is_popular=self.rng.random() < 0.1,
+            is_active=self.rng.random() < 0.95,
+        )
+
+    def sentence(self, words):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(words))
+
+    def create_placeholders(self, count):
+        """Write a small set of solid-colour JPEGs to media storage and return their names per folder."""
+        names = {}
+        for folder in ('packages', 'categories', 'blog'):
+            names[folder] = []
+            for i in range(max(count, 1)):
+                name = f'{folder}/generated/placeholder-{i}.jpg'
+                if not default_storage.exists(name):
+                    buffer = io.BytesIO()
+                    Image.new('RGB', (1200, 800), IMAGE_COLOURS[i % len(IMAGE_COLOURS)]).save(buffer, 'JPEG', quality=70)
+                    name = default_storage.save(name, ContentFile(buffer.getvalue()))
+                names[folder].append(name)
+        return names
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from packages.mail import send_due_emails
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails from the outbox, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Emails sent per SMTP connection')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds to wait when the outbox is empty')
+        parser.add_argument('--once', action='store_true', help='Drain what is due now, then exit (for cron)')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        try:
+            while True:
+                close_old_connections()
+                sent, failed = send_due_emails(batch_size)
+                if sent or failed:
+                    self.stdout.write(f'Sent {sent}, failed {failed}')
+                if sent + failed < batch_size:
+                    # Outbox drained for now
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from packages.models import NewsletterCampaign
+from packages.newsletter import SENDABLE_STATUSES, send_campaign
+
+
+class Command(BaseCommand):
+    help = 'Send queued newsletter campaigns, resuming any that were interrupted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('campaign_ids', nargs='*', type=int, help='Campaigns to send (default: every queued, sending or paused one)')
+        parser.add_argument('--batch-size', type=int, help='Messages per send_messages() call')
+        parser.add_argument('--rate', type=float, help='Messages per second (0 = unthrottled)')
+
+    def handle(self, *args, **options):
+        campaigns = NewsletterCampaign.objects.order_by('created_at')
+        if options['campaign_ids']:
+            campaigns = campaigns.filter(pk__in=options['campaign_ids'])
+            already_sent = [c.pk for c in campaigns if c.status == 'sent']
+            if already_sent:
+                raise CommandError(f'Campaign(s) already sent: {already_sent}')
+        else:
+            campaigns = campaigns.filter(status__in=SENDABLE_STATUSES)
+
+        for campaign in campaigns:
+            resumed = f' (resuming after subscriber {campaign.last_subscriber_id})' if campaign.last_subscriber_id else ''
+            self.stdout.write(f'Sending "{campaign}"{resumed}')
+            sent = send_campaign(campaign, batch_size=options['batch_size'], rate=options['rate'])
+            if sent is None:
+                self.stdout.write(self.style.WARNING('  Skipped: another send_newsletter run is sending it'))
+                continue
+            style = self.style.SUCCESS if campaign.status == 'sent' else self.style.WARNING
+            self.stdout.write(style(
+                f'  {campaign.get_status_display()}: {sent} sent now, '
+                f'{campaign.sent_count} sent / {campaign.failed_count} failed in total'
+            ))
+            if campaign.last_error:
+                self.stdout.write(self.style.WARNING(f'  {campaign.last_error}'))
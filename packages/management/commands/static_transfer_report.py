@@ -0,0 +1,96 @@
+import gzip
+import posixpath
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand
+from django.test import Client
+from whitenoise.compress import Compressor
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ASSET_URL = re.compile(r'''(?:src|href)=["']([^"']+)["']|url\(\s*["']?([^"')]+)["']?\s*\)''')
+# Rough request + response header bytes for a conditional GET answered with 304 Not Modified.
+REVALIDATION_BYTES = 400
+
+
+class Command(BaseCommand):
+    help = (
+        'Estimate first- and repeat-visit static transfer for public pages: before (unhashed, gzip, '
+        'revalidated after 60s) versus now (hashed + immutable, Brotli where available)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', default=['/', '/packages/'], help='Pages to fetch')
+
+    def handle(self, *args, **options):
+        hashed_to_original = {hashed: name for name, hashed in getattr(staticfiles_storage, 'hashed_files', {}).items()}
+        if not hashed_to_original:
+            self.stdout.write(self.style.WARNING(
+                'No static manifest loaded: run collectstatic with the hashed storage (production settings) '
+                'to measure real file names. Treating every asset as hashed.'
+            ))
+        host = next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost')
+        client = Client(HTTP_HOST=host)
+        compressor = Compressor(quiet=True)
+
+        for path in options['paths']:
+            response = client.get(path, secure=True)
+            assets = self.page_assets(response.content.decode(), hashed_to_original)
+            before = {'first': 0, 'repeat': 0, 'requests': 0}
+            now = {'first': 0, 'repeat': 0, 'requests': 0}
+            for name, original in sorted(assets.items()):
+                location = finders.find(original)
+                if not location:
+                    continue
+                with open(location, 'rb') as f:
+                    data = f.read()
+                gzipped = len(gzip.compress(data, 9)) if compressor.should_compress(original) else len(data)
+                brotlied = len(brotli.compress(data)) if brotli and compressor.should_compress(original) else gzipped
+                before['first'] += min(gzipped, len(data))
+                before['repeat'] += REVALIDATION_BYTES
+                before['requests'] += 1
+                now['first'] += min(brotlied, gzipped, len(data))
+                if hashed_to_original and name not in hashed_to_original:
+                    # Not hashed, so still only cacheable for WHITENOISE_MAX_AGE
+                    now['repeat'] += REVALIDATION_BYTES
+                    now['requests'] += 1
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{path}  ({response.status_code}, {len(assets)} static assets)'))
+            for label, totals in (('before', before), ('now', now)):
+                self.stdout.write(
+                    f'  {label:<7} first visit {totals["first"] / 1024:9.1f} KiB   '
+                    f'repeat visit {totals["repeat"] / 1024:7.1f} KiB in {totals["requests"]} request(s)'
+                )
+
+    def page_assets(self, html, hashed_to_original):
+        """{served name: source name} for static files the page references, plus those its stylesheets reference."""
+        assets = {}
+        for url in self.static_urls(html):
+            assets[url] = hashed_to_original.get(url, url)
+        for name, original in list(assets.items()):
+            if not original.endswith('.css'):
+                continue
+            # The collected copy, whose references collectstatic has rewritten to hashed names
+            location = finders.find(original) if not hashed_to_original else staticfiles_storage.path(name)
+            if not location:
+                continue
+            with open(location, encoding='utf-8', errors='replace') as f:
+                for url in self.static_urls(f.read(), base=posixpath.dirname(name)):
+                    assets.setdefault(url, hashed_to_original.get(url, url))
+        return assets
+
+    def static_urls(self, text, base=None):
+        for match in ASSET_URL.finditer(text):
+            url = (match[1] or match[2]).split('#')[0].split('?')[0]
+            if url.startswith(settings.STATIC_URL):
+                yield url[len(settings.STATIC_URL):]
+            elif base is not None and url and not re.match(r'^(?:[a-z]+:|/)', url):
+                name = posixpath.normpath(posixpath.join(base, url))
+                if not name.startswith('..'):
+                    yield name
@@ -0,0 +1,153 @@
+"""Prometheus metrics, served at ``/metrics``.
+
+Gunicorn runs several worker processes and each request lands in one of
+them, so in-memory counters would only describe whichever worker answers the
+scrape. ``gunicorn.conf.py`` sets ``PROMETHEUS_MULTIPROC_DIR``: every worker
+then writes its samples to memory-mapped files there, and the view adds them
+up across workers (or reports them per worker, for the ``worker_*`` gauges).
+Without the variable, e.g. under ``runserver``, the process's own values are
+served.
+
+Request, query and template metrics come from ``RequestTimingMiddleware``.
+Outbox sizes are counted in the database at scrape time, so they are right
+whichever process sends the mail.
+"""
+import hmac
+import os
+import resource
+import sys
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Count
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.cache import never_cache
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.exposition import choose_encoder
+
+NAMESPACE = 'nature_holidays'
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# ru_maxrss is in kilobytes on Linux and bytes on macOS
+MAXRSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+REQUEST_LATENCY = Histogram(
+    'request_duration_seconds', 'Time to respond, by URL name', ['route', 'method'],
+    namespace=NAMESPACE, buckets=LATENCY_BUCKETS,
+)
+REQUESTS = Counter('requests', 'Responses by URL name and status class', ['route', 'method', 'status'], namespace=NAMESPACE)
+DB_QUERIES = Counter('db_queries', 'SQL queries run while handling requests', ['route'], namespace=NAMESPACE)
+DB_DURATION = Counter('db_query_duration_seconds', 'Time spent in SQL while handling requests', ['route'], namespace=NAMESPACE)
+DUPLICATE_QUERIES = Counter(
+    'db_duplicate_queries', 'Queries repeating a statement already run in the same request', ['route'], namespace=NAMESPACE,
+)
+TEMPLATE_DURATION = Counter('template_render_duration_seconds', 'Time spent rendering templates', ['route'], namespace=NAMESPACE)
+CACHE_LOOKUPS = Counter('cache_lookups', 'Cache lookups by caching layer and result (hit or miss)', ['layer', 'result'], namespace=NAMESPACE)
+IN_PROGRESS = Gauge('requests_in_progress', 'Requests being handled', namespace=NAMESPACE, multiprocess_mode='livesum')
+WORKER_REQUESTS = Gauge(
+    'worker_requests_handled', 'Requests handled by each live worker process', namespace=NAMESPACE, multiprocess_mode='liveall',
+)
+WORKER_MAX_RSS = Gauge(
+    'worker_max_rss_bytes', 'Peak resident memory of each live worker process', namespace=NAMESPACE, multiprocess_mode='liveall',
+)
+WORKER_STARTED = Gauge(
+    'worker_start_time_seconds', 'When each live worker process handled its first request',
+    namespace=NAMESPACE, multiprocess_mode='liveall',
+)
+
+_worker = {'pid': None, 'requests': 0}
+# The media storage's URL memo counts in plain integers (it is hit dozens of times per page);
+# each request publishes what changed since the last one.
+_media_urls_seen = {'hit': 0, 'miss': 0}
+
+
+def record_cache_lookup(layer, hit):
+    CACHE_LOOKUPS.labels(layer, 'hit' if hit else 'miss').inc()
+
+
+def record_request(request, response, timings):
+    """Called by ``RequestTimingMiddleware`` once the response is ready."""
+    match = getattr(request, 'resolver_match', None)
+    # Unmatched paths (404s) share one label, so scanners cannot create a series per URL
+    route = match.view_name if match else 'unmatched'
+    REQUEST_LATENCY.labels(route, request.method).observe(timings.total)
+    REQUESTS.labels(route, request.method, f'{response.status_code // 100}xx').inc()
+    DB_QUERIES.labels(route).inc(timings.queries)
+    DB_DURATION.labels(route).inc(timings.db)
+    DUPLICATE_QUERIES.labels(route).inc(sum(count - 1 for _, count in timings.duplicates()))
+    TEMPLATE_DURATION.labels(route).inc(timings.template)
+    _record_media_url_cache()
+    _record_worker()
+
+
+def _record_media_url_cache():
+    for result, attribute in (('hit', 'url_cache_hits'), ('miss', 'url_cache_misses')):
+        total = getattr(default_storage, attribute, 0)
+        if total != _media_urls_seen[result]:
+            CACHE_LOOKUPS.labels('media_url', result).inc(max(total - _media_urls_seen[result], 0))
+            _media_urls_seen[result] = total
+
+
+def _record_worker():
+    pid = os.getpid()
+    if _worker['pid'] != pid:
+        # First request in this process (workers fork from a master that may have imported us)
+        _worker.update(pid=pid, requests=0)
+        WORKER_STARTED.set_to_current_time()
+    _worker['requests'] += 1
+    WORKER_REQUESTS.set(_worker['requests'])
+    WORKER_MAX_RSS.set(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * MAXRSS_UNIT)
+
+
+class OutboxCollector:
+    """Emails waiting in the outbox, counted when scraped."""
+
+    def family(self):
+        return GaugeMetricFamily(f'{NAMESPACE}_outbound_emails', 'Emails not yet sent, by outbox status', labels=['status'])
+
+    def describe(self):
+        # Lets the registry check the name without querying the database
+        yield self.family()
+
+    def collect(self):
+        from .models import OutboundEmail
+
+        counts = dict(
+            OutboundEmail.objects.exclude(status='sent').values_list('status').annotate(Count('pk')).order_by()
+        )
+        family = self.family()
+        for status, _ in OutboundEmail.STATUS_CHOICES:
+            if status != 'sent':
+                family.add_metric([status], counts.get(status, 0))
+        yield family
+
+
+OUTBOX = OutboxCollector()
+REGISTRY.register(OUTBOX)
+
+
+def scrape_registry():
+    """Every worker's samples when they share a directory, else this process's."""
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(OUTBOX)
+    return registry
+
+
+def authorized(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode()):
+        return True
+    return request.user.is_active and request.user.is_staff
+
+
+@never_cache
+def metrics_view(request):
+    """Prometheus scrape target: staff users, or ``Authorization: Bearer <METRICS_TOKEN>``."""
+    if not authorized(request):
+        return HttpResponseForbidden('Staff login or a metrics token is required.')
+    # Prometheus format, or OpenMetrics if the scraper asks for it
+    encoder, content_type = choose_encoder(request.headers.get('Accept'))
+    return HttpResponse(encoder(scrape_registry()), content_type=content_type)
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:23
+
+import django.contrib.postgres.search
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+SEARCH_INDEX = GinIndex(fields=['search_vector'], name='package_search_vector_gin')
+
+
+def create_search_index(apps, schema_editor):
+    # tsvector / GIN only exist on Postgres; SQLite dev databases fall back to icontains.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Package = apps.get_model('packages', 'Package')
+    schema_editor.add_index(Package, SEARCH_INDEX)
+    Package.objects.update(search_vector=(
+        SearchVector('name', weight='A', config='english')
+        + SearchVector('destinations', 'location', weight='B', config='english')
+        + SearchVector('description', weight='C', config='english')
+    ))
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.remove_index(apps.get_model('packages', 'Package'), SEARCH_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0010_cta_background_optional'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='package',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
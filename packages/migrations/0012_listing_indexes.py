@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0011_package_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(condition=models.Q(('is_active', True), ('status', 'published')), fields=['-published_date', '-created_at', '-id'], name='blog_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(condition=models.Q(('is_active', True), ('status', 'published')), fields=['category', '-published_date', '-created_at', '-id'], name='blog_category_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogcomment',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['blog', '-created_at'], name='blogcomment_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='package',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-is_featured', '-created_at', '-id'], name='package_active_list_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='package',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', '-is_featured', '-created_at', '-id'], name='package_category_list_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='package',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['package_type', '-is_featured', '-created_at', '-id'], name='package_type_list_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='package',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['price'], name='package_active_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='package',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_featured', True)), fields=['id'], name='package_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='package',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_popular', True)), fields=['id'], name='package_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='packageexclusion',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['package', 'order', 'title'], name='package_exclusion_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='packageinclusion',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['package', 'order', 'title'], name='package_inclusion_active_idx'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0014_newsletter_campaign'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blog',
+            name='image_metadata',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='image_metadata',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ctasection',
+            name='image_metadata',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='heroslide',
+            name='image_metadata',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='instagrampost',
+            name='image_metadata',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='itinerary',
+            name='image_metadata',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='package',
+            name='image_metadata',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='packageimage',
+            name='image_metadata',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='sitepagemedia',
+            name='image_metadata',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='teammember',
+            name='image_metadata',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:07
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('packages', '0015_image_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueryFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=16)),
+                ('view', models.CharField(blank=True, help_text='URL name of the view that ran it', max_length=200)),
+                ('sql', models.TextField(help_text='The statement with its literals replaced by ?')),
+                ('calls', models.PositiveBigIntegerField(default=0)),
+                ('total_ms', models.FloatField(default=0)),
+                ('max_ms', models.FloatField(default=0)),
+                ('max_per_request', models.PositiveIntegerField(default=0, help_text='Most calls in a single request; above 1 suggests an N+1')),
+                ('slow_calls', models.PositiveBigIntegerField(default=0)),
+                ('first_seen', models.DateTimeField(auto_now_add=True)),
+                ('last_seen', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Query Fingerprint',
+                'verbose_name_plural': 'Query Fingerprints',
+                'ordering': ['-total_ms'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(db_index=True, max_length=16)),
+                ('view', models.CharField(blank=True, max_length=200)),
+                ('sql', models.TextField()),
+                ('duration_ms', models.FloatField()),
+                ('plan', models.TextField(blank=True)),
+                ('analyzed', models.BooleanField(default=False, help_text='Plan from EXPLAIN ANALYZE (actual timings)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Slow Query',
+                'verbose_name_plural': 'Slow Queries',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='queryfingerprint',
+            constraint=models.UniqueConstraint(fields=('fingerprint', 'view'), name='query_fingerprint_view_uniq'),
+        ),
+    ]
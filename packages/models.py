@@ -1,7 +1,23 @@
-from django.db import models
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, SearchVectorField
+from django.db import connection, models
+from django.db.models import Case, F, IntegerField, Prefetch, Q, Value, When
+from django.utils import timezone
+
+class ImageMetadataModel(models.Model):
+    """
+    Base for models with ImageFields. ``image_metadata`` maps each image field to
+    its dimensions, dominant colour and inline placeholder, recorded once when the
+    image is uploaded (see packages/images.py) so templates never open the file.
+    """
+    image_metadata = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
 
 # Create your models here.
-class Category(models.Model):
+class Category(ImageMetadataModel):
     name = models.CharField(max_length=200)
     description = models.TextField()
     cover_image = models.ImageField(upload_to='categories/', null=True, blank=True)
@@ -28,7 +44,72 @@ class Offer(models.Model):
         return self.title
     
 
-class Package(models.Model):
+# Weighted full-text document for packages: name (A) outranks destinations and
+# location (B), which outrank the description (C).
+PACKAGE_SEARCH_VECTOR = (
+    SearchVector('name', weight='A', config='english')
+    + SearchVector('destinations', 'location', weight='B', config='english')
+    + SearchVector('description', weight='C', config='english')
+)
+
+
+class PackageQuerySet(models.QuerySet):
+    def update_search_vector(self):
+        """Recompute the stored search document. Needed after bulk writes that skip save()."""
+        if connection.vendor == 'postgresql':
+            return self.update(search_vector=PACKAGE_SEARCH_VECTOR)
+        return 0
+
+    def search(self, query, ranked=True):
+        """
+        Filter to packages matching ``query`` and, if ``ranked``, annotate a ``rank`` to order by.
+        Postgres uses the GIN-indexed ``search_vector``; other databases fall back
+        to ``icontains`` with the same field weighting.
+        """
+        if connection.vendor == 'postgresql':
+            search_query = SearchQuery(query, search_type='websearch', config='english')
+            queryset = self.filter(search_vector=search_query)
+            if not ranked:
+                return queryset
+            return queryset.annotate(rank=SearchRank(F('search_vector'), search_query))
+        queryset = self.filter(
+            Q(name__icontains=query) |
+            Q(description__icontains=query) |
+            Q(destinations__icontains=query) |
+            Q(location__icontains=query)
+        )
+        if not ranked:
+            return queryset
+        return queryset.annotate(rank=Case(
+            When(name__icontains=query, then=Value(3)),
+            When(Q(destinations__icontains=query) | Q(location__icontains=query), then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        ))
+
+
+    # Loading profiles: each joins or prefetches everything its templates touch,
+    # so a page runs the same number of queries however many packages it shows.
+
+    def for_card(self):
+        """A package card: the offer feeds the price and discount badge."""
+        return self.select_related('offer')
+
+    def for_list(self):
+        """Listing rows: card data without the long text columns cards never render."""
+        return self.for_card().defer('description', 'search_vector')
+
+    def for_detail(self):
+        """The detail page, with its active child rows prefetched into ``active_*`` lists."""
+        return self.select_related('category', 'offer').prefetch_related(
+            Prefetch('packageimage_set', queryset=PackageImage.objects.filter(is_active=True), to_attr='active_images'),
+            Prefetch('itineraries', queryset=Itinerary.objects.filter(is_active=True), to_attr='active_itineraries'),
+            Prefetch('inclusions', queryset=PackageInclusion.objects.filter(is_active=True), to_attr='active_inclusions'),
+            Prefetch('exclusions', queryset=PackageExclusion.objects.filter(is_active=True), to_attr='active_exclusions'),
+        )
+
+
+class Package(ImageMetadataModel):
     PACKAGE_TYPE_CHOICES = [
         ('family', 'Family'),
         ('group', 'Group'),
@@ -54,9 +135,29 @@ class Package(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = PackageQuerySet.as_manager()
+
+    class Meta:
+        # Partial indexes shaped to the public queries, which all filter is_active=True:
+        # the package list sort (-is_featured, -created_at, -id) alone and behind the
+        # category/type filters, the price range filter, and the home page rows.
+        indexes = [
+            models.Index(fields=['-is_featured', '-created_at', '-id'], condition=Q(is_active=True), name='package_active_list_idx'),
+            models.Index(fields=['category', '-is_featured', '-created_at', '-id'], condition=Q(is_active=True), name='package_category_list_idx'),
+            models.Index(fields=['package_type', '-is_featured', '-created_at', '-id'], condition=Q(is_active=True), name='package_type_list_idx'),
+            models.Index(fields=['price'], condition=Q(is_active=True), name='package_active_price_idx'),
+            models.Index(fields=['id'], condition=Q(is_active=True, is_featured=True), name='package_featured_idx'),
+            models.Index(fields=['id'], condition=Q(is_active=True, is_popular=True), name='package_popular_idx'),
+        ]
     
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        Package.objects.filter(pk=self.pk).update_search_vector()
     
     def get_offer_price(self):
         if self.offer:
@@ -68,7 +169,7 @@ class Package(models.Model):
             return self.offer.discount_percentage
         return 0
 
-class PackageImage(models.Model):
+class PackageImage(ImageMetadataModel):
     package = models.ForeignKey(Package, on_delete=models.CASCADE)
     image = models.ImageField(upload_to='packages/')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -78,7 +179,7 @@ class PackageImage(models.Model):
     def __str__(self):
         return self.package.name + " - " + str(self.id)
 
-class TeamMember(models.Model):
+class TeamMember(ImageMetadataModel):
     name = models.CharField(max_length=100)
     position = models.CharField(max_length=100)
     image = models.ImageField(upload_to='team/')
@@ -115,7 +216,38 @@ class NewsletterSubscription(models.Model):
     def __str__(self):
         return self.email
 
-class CTASection(models.Model):
+class NewsletterCampaign(models.Model):
+    """A newsletter sent to every active subscriber by the send_newsletter command."""
+    STATUS_CHOICES = [
+        ('draft', 'Draft'),
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('paused', 'Paused'),
+        ('sent', 'Sent'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    content = models.TextField(help_text='HTML body, placed inside the newsletter email layout')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='draft')
+    # Subscribers are sent in pk order; a resumed send continues after this one
+    last_subscriber_id = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # Lease held by the send_newsletter run delivering the campaign; renewed after every batch
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.subject
+
+class CTASection(ImageMetadataModel):
     title = models.CharField(max_length=200)
     subtitle = models.CharField(max_length=200)
     description = models.TextField()
@@ -128,7 +260,7 @@ class CTASection(models.Model):
     def __str__(self):
         return self.title
 
-class Itinerary(models.Model):
+class Itinerary(ImageMetadataModel):
     package = models.ForeignKey(Package, on_delete=models.CASCADE, related_name='itineraries')
     day_number = models.IntegerField()
     title = models.CharField(max_length=200)
@@ -158,6 +290,9 @@ class PackageInclusion(models.Model):
 
     class Meta:
         ordering = ['order', 'title']
+        indexes = [
+            models.Index(fields=['package', 'order', 'title'], condition=Q(is_active=True), name='package_inclusion_active_idx'),
+        ]
 
     def __str__(self):
         return f"{self.package.name} - {self.title}"
@@ -174,6 +309,9 @@ class PackageExclusion(models.Model):
 
     class Meta:
         ordering = ['order', 'title']
+        indexes = [
+            models.Index(fields=['package', 'order', 'title'], condition=Q(is_active=True), name='package_exclusion_active_idx'),
+        ]
 
     def __str__(self):
         return f"{self.package.name} - {self.title}"
@@ -205,7 +343,21 @@ class BlogTag(models.Model):
     def __str__(self):
         return self.name
 
-class Blog(models.Model):
+class BlogQuerySet(models.QuerySet):
+    def for_card(self):
+        """Sidebar and related-post teasers: title, image and date only."""
+        return self.only('id', 'title', 'slug', 'featured_image', 'image_metadata', 'published_date', 'created_at')
+
+    def for_list(self):
+        """Blog list cards, which show the category name but never the post body."""
+        return self.select_related('category').defer('content')
+
+    def for_detail(self):
+        """The post page: category joined, tags prefetched for the tag lists."""
+        return self.select_related('category').prefetch_related('tags')
+
+
+class Blog(ImageMetadataModel):
     STATUS_CHOICES = [
         ('draft', 'Draft'),
         ('published', 'Published'),
@@ -227,8 +379,24 @@ class Blog(models.Model):
     is_featured = models.BooleanField(default=False)
     views_count = models.PositiveIntegerField(default=0)
 
+    objects = BlogQuerySet.as_manager()
+
     class Meta:
         ordering = ['-published_date', '-created_at']
+        # Public listings only read published, active posts in published_date order
+        # (with id as the keyset tiebreaker), optionally within one category.
+        indexes = [
+            models.Index(
+                fields=['-published_date', '-created_at', '-id'],
+                condition=Q(status='published', is_active=True),
+                name='blog_published_idx',
+            ),
+            models.Index(
+                fields=['category', '-published_date', '-created_at', '-id'],
+                condition=Q(status='published', is_active=True),
+                name='blog_category_published_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -246,6 +414,9 @@ class BlogComment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['blog', '-created_at'], condition=Q(is_active=True), name='blogcomment_active_idx'),
+        ]
 
     def __str__(self):
         return f'Comment by {self.name} on {self.blog.title}'
@@ -275,7 +446,42 @@ class Contact(models.Model):
         return f'Contact from {self.name} - {self.created_at.strftime("%Y-%m-%d")}'
 
 
-class InstagramPost(models.Model):
+class OutboundEmail(models.Model):
+    """A queued email, sent by the run_mail_worker command rather than inside the request."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    content_subtype = models.CharField(max_length=20, default='html')
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list)
+    contact = models.ForeignKey(Contact, on_delete=models.SET_NULL, null=True, blank=True, related_name='emails')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    # When a pending row is due, or when a worker's claim on a sending row lapses
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Outbound Email'
+        verbose_name_plural = 'Email Outbox'
+        indexes = [
+            models.Index(fields=['next_attempt_at'], condition=Q(status__in=['pending', 'sending']), name='outbound_email_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} → {", ".join(self.to)}'
+
+
+class InstagramPost(ImageMetadataModel):
     title = models.CharField(max_length=150, blank=True, help_text="Optional label for admin / image alt text")
     image = models.ImageField(upload_to='instagram/')
     link = models.URLField(
@@ -297,7 +503,7 @@ class InstagramPost(models.Model):
         return self.title or f'Instagram image #{self.pk}'
 
 
-class HeroSlide(models.Model):
+class HeroSlide(ImageMetadataModel):
     """Homepage hero carousel slide — image + copy managed in admin."""
     image = models.ImageField(
         upload_to='hero/',
@@ -341,7 +547,7 @@ class HeroSlide(models.Model):
         return self.title or f'Hero slide #{self.pk}'
 
 
-class SitePageMedia(models.Model):
+class SitePageMedia(ImageMetadataModel):
     """
     Singleton row for site-wide photographic media (about, choose-us, breadcrumb).
     Decorative icons/SVGs stay in static files.
@@ -440,3 +646,73 @@ class SitePageMedia(models.Model):
     def get_solo(cls):
         obj, _ = cls.objects.get_or_create(pk=1)
         return obj
+
+
+class QueryFingerprint(models.Model):
+    """Timings of one SQL statement shape, as issued by one view (see packages/querylog.py)."""
+    fingerprint = models.CharField(max_length=16)
+    view = models.CharField(max_length=200, blank=True, help_text="URL name of the view that ran it")
+    sql = models.TextField(help_text="The statement with its literals replaced by ?")
+    calls = models.PositiveBigIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    max_per_request = models.PositiveIntegerField(default=0, help_text="Most calls in a single request; above 1 suggests an N+1")
+    slow_calls = models.PositiveBigIntegerField(default=0)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-total_ms']
+        verbose_name = 'Query Fingerprint'
+        verbose_name_plural = 'Query Fingerprints'
+        constraints = [
+            models.UniqueConstraint(fields=['fingerprint', 'view'], name='query_fingerprint_view_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.view or "-"}: {self.sql[:80]}'
+
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.calls if self.calls else 0
+
+
+class SlowQuery(models.Model):
+    """A query over QUERY_LOG_SLOW_MS and its plan; only the newest QUERY_LOG_SIZE are kept."""
+    fingerprint = models.CharField(max_length=16, db_index=True)
+    view = models.CharField(max_length=200, blank=True)
+    sql = models.TextField()
+    duration_ms = models.FloatField()
+    plan = models.TextField(blank=True)
+    analyzed = models.BooleanField(default=False, help_text="Plan from EXPLAIN ANALYZE (actual timings)")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Slow Query'
+        verbose_name_plural = 'Slow Queries'
+
+    def __str__(self):
+        return f'{self.duration_ms:.0f} ms {self.view or "-"}: {self.sql[:80]}'
+
+
+class RequestProfile(models.Model):
+    """A request run under the profiler by a staff user (see packages/profiling.py); its files live in PROFILE_DIR."""
+    name = models.CharField(max_length=64, unique=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    queries = models.PositiveIntegerField(default=0)
+    samples = models.PositiveIntegerField(default=0, help_text="Stack samples in the collapsed-stack file")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Request Profile'
+        verbose_name_plural = 'Request Profiles'
+
+    def __str__(self):
+        return f'{self.method} {self.path} ({self.duration_ms:.0f} ms)'
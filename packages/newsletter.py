@@ -0,0 +1,146 @@
+"""Bulk newsletter sending.
+
+A campaign is rendered once, then streamed to active subscribers in pk order
+over one SMTP connection, ``NEWSLETTER_BATCH_SIZE`` messages per
+``send_messages`` call and no faster than ``NEWSLETTER_RATE_LIMIT`` messages
+per second. After every batch the campaign records the last subscriber
+reached, so a crashed or paused send resumes where it stopped; at most the one
+batch in flight at the time of a crash is sent twice. A run claims the
+campaign with a lease first, so overlapping runs never send it in parallel.
+"""
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.db.models.functions import Coalesce
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import NewsletterCampaign, NewsletterSubscription
+
+NEWSLETTER_BATCH_SIZE = getattr(settings, 'NEWSLETTER_BATCH_SIZE', 50)
+# Messages per second; 0 disables throttling. Gmail accounts allow a few thousand a day.
+NEWSLETTER_RATE_LIMIT = getattr(settings, 'NEWSLETTER_RATE_LIMIT', 5)
+# Campaigns the send_newsletter command picks up by default; a 'sending' one is only
+# claimed once the run sending it has released it or its lease has expired.
+SENDABLE_STATUSES = ('queued', 'sending', 'paused')
+# A run that dies without releasing its campaign (a killed worker) holds it this long.
+NEWSLETTER_CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+class Throttle:
+    """Spaces out sends so that ``rate`` messages per second is never exceeded on average."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.next_send = None
+
+    def wait(self, count):
+        if not self.rate:
+            return
+        now = time.monotonic()
+        if self.next_send is not None and self.next_send > now:
+            time.sleep(self.next_send - now)
+            now = self.next_send
+        self.next_send = now + count / self.rate
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def claim_campaign(campaign):
+    """
+    Mark ``campaign`` as sending under a fresh lease and reload it. Returns
+    False if it has been sent or another run holds an unexpired lease on it;
+    the conditional UPDATE lets only one of several overlapping runs win.
+    """
+    now = timezone.now()
+    claimed = (
+        NewsletterCampaign.objects.filter(pk=campaign.pk).exclude(status='sent')
+        .filter(Q(claimed_until__isnull=True) | Q(claimed_until__lt=now))
+        .update(
+            status='sending', claimed_until=now + NEWSLETTER_CLAIM_TIMEOUT,
+            started_at=Coalesce('started_at', now), last_error='', updated_at=now,
+        )
+    )
+    if claimed:
+        campaign.refresh_from_db()
+    return bool(claimed)
+
+
+def _renew_claim(campaign):
+    """Extend this run's lease; False if it lapsed and another run took the campaign over."""
+    lease = timezone.now() + NEWSLETTER_CLAIM_TIMEOUT
+    renewed = NewsletterCampaign.objects.filter(pk=campaign.pk, claimed_until=campaign.claimed_until).update(claimed_until=lease)
+    campaign.claimed_until = lease
+    return bool(renewed)
+
+
+def _release_claim(campaign):
+    NewsletterCampaign.objects.filter(pk=campaign.pk, claimed_until=campaign.claimed_until).update(claimed_until=None)
+    campaign.claimed_until = None
+
+
+def send_campaign(campaign, batch_size=None, rate=None):
+    """
+    Send (or resume) ``campaign``. Returns the number of messages sent by this
+    call, or None if another run is sending it.
+
+    Stops with status ``paused`` if a whole batch fails, which usually means the
+    SMTP server dropped us; running it again picks up from the same subscriber.
+    """
+    if not claim_campaign(campaign):
+        return None
+    batch_size = batch_size or NEWSLETTER_BATCH_SIZE
+    throttle = Throttle(NEWSLETTER_RATE_LIMIT if rate is None else rate)
+    html = render_to_string('emails/newsletter.html', {'campaign': campaign})
+
+    subscribers = (
+        NewsletterSubscription.objects.filter(is_active=True, pk__gt=campaign.last_subscriber_id)
+        .order_by('pk').values_list('pk', 'email')
+        .iterator(chunk_size=batch_size * 20)
+    )
+    sent_by_call = 0
+    # fail_silently: a refused address counts as failed instead of aborting the batch
+    connection = get_connection(fail_silently=True)
+    connection.open()
+    try:
+        for batch in _batches(subscribers, batch_size):
+            if not _renew_claim(campaign):
+                return sent_by_call
+            messages = []
+            for _, email in batch:
+                message = EmailMessage(campaign.subject, html, settings.DEFAULT_FROM_EMAIL, [email])
+                message.content_subtype = 'html'
+                messages.append(message)
+            throttle.wait(len(messages))
+            sent = connection.send_messages(messages) or 0
+            if not sent:
+                campaign.status = 'paused'
+                campaign.last_error = f'No messages accepted in the batch after subscriber {campaign.last_subscriber_id}'
+                campaign.claimed_until = None
+                campaign.save(update_fields=['status', 'last_error', 'claimed_until', 'updated_at'])
+                return sent_by_call
+            campaign.last_subscriber_id = batch[-1][0]
+            campaign.sent_count += sent
+            campaign.failed_count += len(messages) - sent
+            campaign.save(update_fields=['last_subscriber_id', 'sent_count', 'failed_count', 'updated_at'])
+            sent_by_call += sent
+    except BaseException:
+        # Let the next run resume straight away instead of waiting out the lease
+        _release_claim(campaign)
+        raise
+    finally:
+        connection.close()
+
+    campaign.status = 'sent'
+    campaign.finished_at = timezone.now()
+    campaign.claimed_until = None
+    campaign.save(update_fields=['status', 'finished_at', 'claimed_until', 'updated_at'])
+    return sent_by_call
@@ -0,0 +1,199 @@
+"""Full-page cache for anonymous visitors.
+
+Public pages render the same HTML for every anonymous visitor until an
+editor changes something in admin. ``cache_anonymous_page`` stores a view's
+rendered response, keyed on the path, query string and the cookies named in
+``PAGE_CACHE_COOKIES``, and serves it to later anonymous GET and HEAD
+requests without running the view.
+
+Each cached page names the models it renders. Saving or deleting a row of a
+model moves that model's page version (``mark_changed``, wired to signals in
+``packages/signals.py``), which only retires the pages that render it: a new
+blog comment leaves the catalog pages, and every other cache, alone.
+
+Responses carry a weak ``ETag`` derived from those versions and
+``Last-Modified``: the time the page's models last changed, or what the
+view's ``last_modified`` function reports. A conditional request that still
+matches gets a ``304``. Logged-in users, other methods and responses that set
+cookies always go through the view. A page with a CSRF form is stored with a
+placeholder where the token was and every visitor gets their own token
+filled in.
+"""
+import hashlib
+import re
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max, Value
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .caching import bump_version, get_version
+from .metrics import record_cache_lookup
+
+CACHE_HEADER = 'X-Page-Cache'
+CSRF_INPUT = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+CSRF_PLACEHOLDER = b'@@csrf_token@@'
+# Response headers stored with the page (ETag, Last-Modified and Cache-Control are set on serving)
+STORED_HEADERS = ('Content-Type', 'Content-Language')
+
+
+def _version_key(model):
+    return f'page_version:{model._meta.label_lower}'
+
+
+def _changed_key(model):
+    return f'page_changed:{model._meta.label_lower}'
+
+
+def mark_changed(*models):
+    """Retire the cached pages that render ``models`` and record when they changed."""
+    now = time.time()
+    for model in models:
+        bump_version(_version_key(model))
+        cache.set(_changed_key(model), now, timeout=None)
+
+
+def page_state(models):
+    """(versions, last changed timestamp) of ``models``, from the cache in one round trip."""
+    keys = [key for model in models for key in (_version_key(model), _changed_key(model))]
+    found = cache.get_many(keys)
+    versions = [found.get(_version_key(model)) or get_version(_version_key(model)) for model in models]
+    changed = []
+    for model in models:
+        value = found.get(_changed_key(model))
+        if value is None:
+            # Evicted or never recorded: changed as far as any client can know
+            value = time.time()
+            cache.add(_changed_key(model), value, timeout=None)
+        changed.append(value)
+    return versions, int(max(changed))
+
+
+def cacheable_request(request):
+    # PAGE_CACHE_TIMEOUT = 0 turns the page cache off
+    if not getattr(settings, 'PAGE_CACHE_TIMEOUT', 10 * 60):
+        return False
+    user = getattr(request, 'user', None)
+    return request.method in ('GET', 'HEAD') and not (user and user.is_authenticated)
+
+
+def page_key(request, versions=()):
+    cookies = [f'{name}={request.COOKIES.get(name, "")}' for name in getattr(settings, 'PAGE_CACHE_COOKIES', [])]
+    parts = [request.get_full_path(), *cookies, ','.join(map(str, versions))]
+    return 'page:' + hashlib.md5('\n'.join(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def latest_update(page_object, *sources):
+    """
+    Newest ``updated_at`` (or ``created_at`` where a model has no
+    ``updated_at``) of ``page_object``, a queryset matching the page's own
+    row, and the other models or querysets the page renders, in one UNION ALL
+    query. None if ``page_object`` matches no row.
+    """
+    parts = []
+    for index, source in enumerate((page_object, *sources)):
+        queryset = source._default_manager.all() if isinstance(source, type) else source
+        names = {field.name for field in queryset.model._meta.concrete_fields}
+        field = next((name for name in ('updated_at', 'created_at') if name in names), None)
+        if field is None:
+            continue  # Edits still move the page version, so the ETag changes
+        # Grouping on a constant leaves a single MAX() row without GROUP BY
+        parts.append(
+            queryset.order_by().values(part=Value(index)).annotate(latest=Max(field)).values_list('part', 'latest')
+        )
+    latest = dict(parts[0].union(*parts[1:], all=True))
+    if latest.get(0) is None:
+        return None
+    return max(value for value in latest.values() if value is not None)
+
+
+def storable(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and 'private' not in response.get('Cache-Control', '')
+        and 'no-store' not in response.get('Cache-Control', '')
+    )
+
+
+def add_validators(response, etag, timestamp, state):
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    # Browsers revalidate on every visit, which usually ends in a 304
+    patch_cache_control(response, no_cache=True)
+    response[CACHE_HEADER] = state
+    return response
+
+
+def cache_anonymous_page(models, last_modified=None, on_hit=None):
+    """
+    Serve the view's response to anonymous visitors from the page cache,
+    until a row of one of ``models`` changes. ``last_modified(request, *args,
+    **kwargs)`` optionally narrows Last-Modified to the rows a detail page
+    shows; it returns None when the page's object doesn't exist or isn't
+    public, and only then is a cold page rendered before answering a
+    conditional request. ``on_hit`` (same arguments) runs for requests
+    answered without calling the view, for side effects such as view counts.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if not cacheable_request(request):
+                return view(request, *args, **kwargs)
+            versions, timestamp = page_state(models)
+            key = page_key(request, versions)
+            entry = cache.get(key)
+            record_cache_lookup('page', entry is not None)
+
+            if entry is not None:
+                etag, timestamp = entry['etag'], entry['last_modified']
+                response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+                if response is None:
+                    response = HttpResponse(entry['content'], status=entry['status'])
+                    for header, value in entry['headers'].items():
+                        response[header] = value
+                    if entry['csrf']:
+                        response.content = response.content.replace(CSRF_PLACEHOLDER, get_token(request).encode())
+                if on_hit is not None:
+                    on_hit(request, *args, **kwargs)
+                return add_validators(response, etag, timestamp, 'hit')
+
+            etag = f'W/{quote_etag(key[len("page:"):])}'
+            if last_modified is not None:
+                modified = last_modified(request, *args, **kwargs)
+                timestamp = int(modified.timestamp()) if modified else None
+                if modified is not None:
+                    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+                    if response is not None:
+                        if on_hit is not None:
+                            on_hit(request, *args, **kwargs)
+                        return add_validators(response, etag, timestamp, 'miss')
+
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response.render()
+            if not storable(response):
+                return response
+            # get_token() marks the request once a template has put a token in the page
+            csrf = bool(request.META.get('CSRF_COOKIE_NEEDS_UPDATE'))
+            content = CSRF_INPUT.sub(rb'\1' + CSRF_PLACEHOLDER + rb'\2', response.content) if csrf else response.content
+            cache.set(key, {
+                'content': content,
+                'status': response.status_code,
+                'headers': {header: response[header] for header in STORED_HEADERS if response.has_header(header)},
+                'csrf': csrf,
+                'etag': etag,
+                'last_modified': timestamp,
+            }, settings.PAGE_CACHE_TIMEOUT)
+            # The client may already hold this very page
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp, response=response)
+            return add_validators(response, etag, timestamp, 'miss')
+        return wrapped
+    return decorator
@@ -0,0 +1,172 @@
+"""Keyset (seek) pagination for the package and blog listings.
+
+OFFSET pagination makes the database walk and discard every earlier row and
+needs an exact COUNT(*) for the page links, so deep pages get slower the
+further a crawler goes. Keyset pagination instead remembers the sort key of
+the last row shown and asks for rows strictly after it, which an index on
+the sort columns answers at the same cost on every page. Totals come from
+the planner's estimate rather than a full count.
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+
+# Above this many rows, non-Postgres databases report "N+" instead of counting.
+ESTIMATE_COUNT_CAP = 1000
+
+
+def use_keyset_pagination(request):
+    """Keyset mode is opted into site-wide by setting, or per request with ``?cursor=``."""
+    return getattr(settings, 'LISTING_PAGINATION', 'offset') == 'keyset' or 'cursor' in request.GET
+
+
+def estimate_count(queryset):
+    """
+    Approximate row count: the planner's estimate on Postgres, otherwise an
+    exact count capped at ``ESTIMATE_COUNT_CAP + 1``.
+    """
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    return queryset.order_by()[:ESTIMATE_COUNT_CAP + 1].count()
+
+
+class KeysetPage:
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Paginate ``queryset`` by a fixed descending sort key.
+
+    ``ordering`` lists field names, most significant first; all sort descending
+    and must end in a unique field (the primary key). Fields named in
+    ``nullable`` sort NULLs first, as a plain descending index on Postgres does.
+    """
+
+    def __init__(self, queryset, per_page, ordering, nullable=()):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = list(ordering)
+        self.nullable = set(nullable)
+        self.model = queryset.model
+
+    @cached_property
+    def _estimate(self):
+        count = estimate_count(self.queryset)
+        capped = connection.vendor != 'postgresql' and count > ESTIMATE_COUNT_CAP
+        return (ESTIMATE_COUNT_CAP if capped else count), capped
+
+    @property
+    def estimated_count(self):
+        return self._estimate[0]
+
+    @property
+    def estimate_is_capped(self):
+        return self._estimate[1]
+
+    def page(self, cursor=None):
+        direction, values = self.decode_cursor(cursor)
+        forward = direction != 'before'
+        queryset = self.queryset.order_by(*self.order_expressions(forward))
+        if values is not None:
+            queryset = queryset.filter(self.seek_q(values, forward))
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+        if not rows:
+            return KeysetPage([], self, None, None)
+        if forward:
+            # A previous page exists whenever we started from a cursor
+            has_next, has_previous = has_more, values is not None
+        else:
+            # Paging back, the page we came from is always next
+            has_next, has_previous = True, has_more
+        next_cursor = self.encode_cursor('after', rows[-1]) if has_next else None
+        previous_cursor = self.encode_cursor('before', rows[0]) if has_previous else None
+        return KeysetPage(rows, self, next_cursor, previous_cursor)
+
+    def order_expressions(self, forward):
+        expressions = []
+        for name in self.ordering:
+            if forward:
+                expressions.append(F(name).desc(nulls_first=True) if name in self.nullable else F(name).desc())
+            else:
+                expressions.append(F(name).asc(nulls_last=True) if name in self.nullable else F(name).asc())
+        return expressions
+
+    def seek_q(self, values, forward):
+        """Rows strictly after (forward) or before the given sort key, in sort order."""
+        q = Q(pk__in=[])
+        for i, name in reversed(list(enumerate(self.ordering))):
+            q = self._beyond(name, values[i], forward) | (self._equal(name, values[i]) & q)
+        return q
+
+    def _beyond(self, name, value, forward):
+        nullable = name in self.nullable
+        if value is None:
+            # NULLs sort first: every non-NULL lies beyond them going forward, nothing does going back.
+            return Q(**{f'{name}__isnull': False}) if forward else Q(pk__in=[])
+        if forward:
+            return Q(**{f'{name}__lt': value})
+        q = Q(**{f'{name}__gt': value})
+        return q | Q(**{f'{name}__isnull': True}) if nullable else q
+
+    def _equal(self, name, value):
+        if value is None:
+            return Q(**{f'{name}__isnull': True})
+        return Q(**{name: value})
+
+    def encode_cursor(self, direction, obj):
+        values = []
+        for name in self.ordering:
+            value = getattr(obj, 'pk' if name == 'pk' else name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        payload = json.dumps([direction] + values, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Return (direction, values); an empty or malformed cursor means the first page."""
+        if not cursor:
+            return 'after', None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            direction, values = payload[0], payload[1:]
+            if direction not in ('after', 'before') or len(values) != len(self.ordering):
+                raise ValueError
+            fields = [self.model._meta.pk if name == 'pk' else self.model._meta.get_field(name) for name in self.ordering]
+            values = [None if value is None else field.to_python(value) for field, value in zip(fields, values)]
+        except (ValueError, TypeError, IndexError, ValidationError):
+            return 'after', None
+        return direction, values
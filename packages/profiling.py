@@ -0,0 +1,144 @@
+"""On-demand profiling of single requests.
+
+A staff user adds ``?_profile=1`` to a URL, or sends ``X-Profile: 1``, and
+``ProfilingMiddleware`` runs that request under ``cProfile`` while a
+background thread samples the request thread's Python stack every
+``SAMPLE_INTERVAL`` seconds. Two files are written to ``PROFILE_DIR``:
+
+* ``<name>.prof``: the cProfile statistics, for ``python -m pstats``,
+  snakeviz or ``flameprof``;
+* ``<name>.folded``: one ``frame;frame;frame count`` line per sampled stack,
+  the collapsed-stack format that ``flamegraph.pl`` and speedscope read.
+
+A ``RequestProfile`` row records each one. The admin lists them and serves
+the files. Only the newest ``PROFILE_KEEP`` are kept, rows and files alike.
+"""
+import cProfile
+import io
+import os
+import pstats
+import site
+import sys
+import sysconfig
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import RequestProfile
+from .timing import current_timings
+
+PROFILE_PARAM = '_profile'
+PROFILE_HEADER = 'X-Profile'
+SAMPLE_INTERVAL = 0.002
+FORMATS = {'prof': 'application/octet-stream', 'folded': 'text/plain; charset=utf-8'}
+
+
+def profile_dir():
+    return Path(getattr(settings, 'PROFILE_DIR', '/tmp/nature_holidays_profiles'))
+
+
+def profile_path(name, fmt):
+    return profile_dir() / f'{name}.{fmt}'
+
+
+def wants_profile(request):
+    user = getattr(request, 'user', None)
+    if not (user and user.is_active and user.is_staff):
+        return False
+    return request.GET.get(PROFILE_PARAM) not in (None, '', '0') or request.headers.get(PROFILE_HEADER) == '1'
+
+
+class StackSampler:
+    """Counts the stacks one thread is running, sampled from a background thread."""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name='request stack sampler')
+        # Frames are labelled with paths relative to the project, site-packages or the standard library
+        self._roots = [str(settings.BASE_DIR), *site.getsitepackages(), sysconfig.get_paths()['stdlib']]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self.fold(frame)] += 1
+
+    def fold(self, frame):
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            filename = code.co_filename
+            root = next((root for root in self._roots if filename.startswith(root)), None)
+            if root:
+                filename = os.path.relpath(filename, root)
+            frames.append(f'{code.co_name} ({filename}:{code.co_firstlineno})')
+            frame = frame.f_back
+        return ';'.join(reversed(frames))
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+def profile_request(get_response, request):
+    """Run ``get_response(request)`` under the profiler and sampler; returns (response, RequestProfile)."""
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    with StackSampler(threading.get_ident()) as sampler:
+        response = profiler.runcall(get_response, request)
+    duration = time.perf_counter() - start
+
+    name = f'{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}'
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(profile_path(name, 'prof'))
+    profile_path(name, 'folded').write_text(sampler.collapsed())
+
+    timings = current_timings()
+    match = getattr(request, 'resolver_match', None)
+    profile = RequestProfile.objects.create(
+        name=name, method=request.method, path=request.get_full_path()[:500],
+        view=match.view_name if match else '', status_code=response.status_code,
+        duration_ms=duration * 1000, queries=timings.queries if timings else 0,
+        samples=sum(sampler.stacks.values()), user=request.user,
+    )
+    trim_profiles()
+    return response, profile
+
+
+def trim_profiles():
+    """Delete all but the newest ``PROFILE_KEEP`` profiles (their files go with them, see signals.py)."""
+    keep = getattr(settings, 'PROFILE_KEEP', 20)
+    for profile in RequestProfile.objects.order_by('-created_at', '-pk')[keep:]:
+        profile.delete()
+
+
+def delete_profile_files(profile):
+    for fmt in FORMATS:
+        profile_path(profile.name, fmt).unlink(missing_ok=True)
+
+
+def top_functions(profile, limit=30):
+    """The ``limit`` functions with the most cumulative time, as pstats prints them, or '' if the file is gone."""
+    path = profile_path(profile.name, 'prof')
+    if not path.exists():
+        return ''
+    output = io.StringIO()
+    stats = pstats.Stats(str(path), stream=output)
+    stats.strip_dirs().sort_stats('cumulative').print_stats(limit)
+    return output.getvalue()
@@ -0,0 +1,198 @@
+"""Slow-query log.
+
+At the end of each request ``RequestTimingMiddleware`` hands its
+``RequestTimings`` here. Every statement is reduced to a fingerprint: its SQL
+with the literals and parameter placeholders replaced by ``?`` and IN lists
+collapsed, so ``... LIKE %s LIMIT 8`` from any search is one shape. Calls and
+time per (fingerprint, view) are tallied in memory and added to
+``QueryFingerprint`` rows every ``QUERY_LOG_FLUSH_INTERVAL`` seconds, by the
+request that finds the interval has passed. All workers add to the same rows.
+
+A SELECT taking ``QUERY_LOG_SLOW_MS`` or more is EXPLAINed once the response
+is ready and stored as a ``SlowQuery``. ``QUERY_LOG_EXPLAIN_ANALYZE`` uses
+EXPLAIN ANALYZE on Postgres, which runs the query a second time. Only the
+newest ``QUERY_LOG_SIZE`` are kept, and a fingerprint is explained at most
+once per ``EXPLAIN_COOLDOWN`` per worker.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import QueryFingerprint, SlowQuery
+
+logger = logging.getLogger(__name__)
+
+# Seconds before a worker EXPLAINs the same fingerprint again.
+EXPLAIN_COOLDOWN = 10 * 60
+
+STRING_LITERAL = re.compile(r"'(?:''|[^'])*'")
+NUMBER_LITERAL = re.compile(r'(?<![\w."])-?\d+(?:\.\d+)?\b')
+PLACEHOLDER = re.compile(r'%s|%\(\w+\)s')
+VALUE_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+WHITESPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """(fingerprint, normalised SQL) for a statement as passed to the database driver."""
+    normalised = PLACEHOLDER.sub('?', NUMBER_LITERAL.sub('?', STRING_LITERAL.sub('?', sql)))
+    normalised = WHITESPACE.sub(' ', VALUE_LIST.sub('(...)', normalised)).strip()
+    return hashlib.md5(normalised.encode()).hexdigest()[:16], normalised
+
+
+def is_select(sql):
+    return sql.lstrip()[:6].upper() == 'SELECT'
+
+
+class QueryStats:
+    """Per-worker tallies of (fingerprint, view), added to ``QueryFingerprint`` rows when flushed."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._pending = {}
+        self._last_flush = time.monotonic()
+        self._explained = {}
+
+    def record(self, view, timings):
+        slow = Counter(sql for _, sql, _, _ in timings.slow_queries)
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked after use (gunicorn --preload): the parent's tallies aren't ours
+                self._reset()
+            for sql, calls in timings.statements.items():
+                key, normalised = fingerprint(sql)
+                entry = self._pending.setdefault((key, view), {
+                    'sql': normalised, 'calls': 0, 'seconds': 0.0, 'max': 0.0, 'per_request': 0, 'slow': 0,
+                })
+                entry['calls'] += calls
+                entry['seconds'] += timings.statement_seconds[sql]
+                entry['max'] = max(entry['max'], timings.statement_max[sql])
+                entry['per_request'] = max(entry['per_request'], calls)
+                entry['slow'] += slow[sql]
+            due = time.monotonic() - self._last_flush >= getattr(settings, 'QUERY_LOG_FLUSH_INTERVAL', 60)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Add the pending tallies to the database; returns how many fingerprints were written."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                for (key, view), entry in pending.items():
+                    self._write(key, view, entry, now)
+        except DatabaseError:
+            logger.exception('Flushing query statistics failed; keeping %d fingerprints for the next attempt', len(pending))
+            with self._lock:
+                for key, entry in pending.items():
+                    self._merge(key, entry)
+            return 0
+        return len(pending)
+
+    def _write(self, key, view, entry, now):
+        updates = {
+            'calls': F('calls') + entry['calls'],
+            'total_ms': F('total_ms') + entry['seconds'] * 1000,
+            'max_ms': Greatest('max_ms', entry['max'] * 1000),
+            'max_per_request': Greatest('max_per_request', entry['per_request']),
+            'slow_calls': F('slow_calls') + entry['slow'],
+            'last_seen': now,
+        }
+        rows = QueryFingerprint.objects.filter(fingerprint=key, view=view)
+        if rows.update(**updates):
+            return
+        try:
+            with transaction.atomic():
+                QueryFingerprint.objects.create(
+                    fingerprint=key, view=view, sql=entry['sql'], calls=entry['calls'],
+                    total_ms=entry['seconds'] * 1000, max_ms=entry['max'] * 1000,
+                    max_per_request=entry['per_request'], slow_calls=entry['slow'], last_seen=now,
+                )
+        except IntegrityError:
+            # Another worker created the row first
+            rows.update(**updates)
+
+    def _merge(self, key, entry):
+        current = self._pending.get(key)
+        if current is None:
+            self._pending[key] = entry
+            return
+        current['calls'] += entry['calls']
+        current['seconds'] += entry['seconds']
+        current['slow'] += entry['slow']
+        current['max'] = max(current['max'], entry['max'])
+        current['per_request'] = max(current['per_request'], entry['per_request'])
+
+    def should_explain(self, key):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._explained.get(key, -EXPLAIN_COOLDOWN) < EXPLAIN_COOLDOWN:
+                return False
+            self._explained[key] = now
+            return True
+
+
+query_stats = QueryStats()
+
+
+def explain(alias, sql, params, analyze=False):
+    """The plan for ``sql``, one line per row; ANALYZE only where the backend supports it."""
+    connection = connections[alias]
+    options = {'analyze': True} if analyze and connection.vendor == 'postgresql' else {}
+    with connection.cursor() as cursor:
+        cursor.execute(f'{connection.ops.explain_query_prefix(**options)} {sql}', params)
+        # Postgres returns one text column, SQLite (id, parent, notused, detail)
+        return '\n'.join(str(row[-1]) for row in cursor.fetchall()), bool(options)
+
+
+def capture_slow_queries(view, timings):
+    analyze = getattr(settings, 'QUERY_LOG_EXPLAIN_ANALYZE', False)
+    captured = False
+    for alias, sql, params, seconds in timings.slow_queries:
+        key, normalised = fingerprint(sql)
+        if not is_select(sql) or not query_stats.should_explain(key):
+            continue
+        try:
+            plan, analyzed = explain(alias, sql, params, analyze)
+            SlowQuery.objects.create(
+                fingerprint=key, view=view, sql=normalised, duration_ms=seconds * 1000, plan=plan, analyzed=analyzed,
+            )
+        except DatabaseError:
+            logger.exception('Could not record the plan of a slow query from %s', view or '-')
+            continue
+        captured = True
+        logger.warning('Slow query (%.0f ms) in %s: %s', seconds * 1000, view or '-', normalised[:300])
+    if captured:
+        trim_slow_queries()
+
+
+def trim_slow_queries():
+    """Drop all but the newest ``QUERY_LOG_SIZE`` slow queries."""
+    size = getattr(settings, 'QUERY_LOG_SIZE', 200)
+    cutoff = list(SlowQuery.objects.order_by('-pk').values_list('pk', flat=True)[size:size + 1])
+    if cutoff:
+        SlowQuery.objects.filter(pk__lte=cutoff[0]).delete()
+
+
+def record_request(view, timings):
+    """Called by ``RequestTimingMiddleware`` after the response is ready, outside the timed block."""
+    query_stats.record(view, timings)
+    if timings.slow_queries:
+        capture_slow_queries(view, timings)
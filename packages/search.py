@@ -0,0 +1,230 @@
+"""Shared filter/search pipeline for the package list and /search/.
+
+Request parameters are normalised into a filter dict, so that equivalent
+queries ("Kerala ", "kerala") share one cache entry holding the ordered
+result IDs. Pages are then loaded by primary key, which keeps repeated
+popular searches off the filter/rank/count queries entirely.
+"""
+import hashlib
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils.http import urlencode
+
+from .caching import versioned_key
+from .metrics import record_cache_lookup
+from .models import Package
+
+PACKAGE_SEARCH_TIMEOUT = getattr(settings, 'PACKAGE_SEARCH_CACHE_TIMEOUT', 2 * 60)
+# Larger result sets (e.g. the unfiltered catalog) are paginated straight from the database.
+PACKAGE_SEARCH_MAX_CACHED_IDS = getattr(settings, 'PACKAGE_SEARCH_MAX_CACHED_IDS', 2000)
+TOO_MANY_RESULTS = 'too-many'
+
+PACKAGE_TYPES = {code for code, _ in Package.PACKAGE_TYPE_CHOICES}
+# Descending sort key of the unsearched list; the trailing pk makes it unique for keyset pagination.
+PACKAGE_LIST_ORDERING = ('is_featured', 'created_at', 'pk')
+
+
+def _decimal(value):
+    try:
+        value = Decimal(value)
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    return value if value.is_finite() else None
+
+
+def normalize_package_filters(params):
+    """Return only the valid, canonicalised filters from a GET QueryDict."""
+    filters = {}
+    query = ' '.join(params.get('q', '').split()).lower()
+    if query:
+        filters['q'] = query[:100]
+    category = params.get('category', '').strip()
+    if category.isdigit():
+        filters['category'] = int(category)
+    package_type = params.get('type', '').strip()
+    if package_type in PACKAGE_TYPES:
+        filters['type'] = package_type
+    for name in ('min_price', 'max_price'):
+        price = _decimal(params.get(name, '').strip() or None)
+        if price is not None:
+            filters[name] = price
+    on_offer = params.get('on_offer', '').strip()
+    if on_offer in ('0', '1'):
+        filters['on_offer'] = on_offer == '1'
+    return filters
+
+
+def filter_packages(filters, ordered=True):
+    """Build the queryset for a normalised filter dict (ranked and ordered unless ``ordered`` is False)."""
+    queryset = Package.objects.filter(is_active=True)
+    if 'category' in filters:
+        queryset = queryset.filter(category_id=filters['category'])
+    if 'type' in filters:
+        queryset = queryset.filter(package_type=filters['type'])
+    if 'min_price' in filters:
+        queryset = queryset.filter(price__gte=filters['min_price'])
+    if 'max_price' in filters:
+        queryset = queryset.filter(price__lte=filters['max_price'])
+    if 'on_offer' in filters:
+        queryset = queryset.filter(offer__isnull=not filters['on_offer'])
+    if not ordered:
+        return queryset.search(filters['q'], ranked=False) if 'q' in filters else queryset
+    if 'q' in filters:
+        return queryset.search(filters['q']).order_by('-rank', '-is_featured', '-created_at', '-pk')
+    return queryset.order_by(*['-' + name for name in PACKAGE_LIST_ORDERING])
+
+
+def filter_signature(filters):
+    encoded = urlencode(sorted((name, str(value)) for name, value in filters.items()))
+    return hashlib.md5(encoded.encode()).hexdigest()
+
+
+def package_results(filters):
+    """
+    Return the ordered result IDs for ``filters``, served from cache when possible.
+    Falls back to the queryset itself when the result set is too large to cache.
+    """
+    key = versioned_key(f'package_search:{filter_signature(filters)}')
+    ids = cache.get(key)
+    record_cache_lookup('package_search', ids is not None)
+    if ids == TOO_MANY_RESULTS:
+        return filter_packages(filters)
+    if ids is not None:
+        return ids
+    queryset = filter_packages(filters)
+    ids = list(queryset.values_list('pk', flat=True)[:PACKAGE_SEARCH_MAX_CACHED_IDS + 1])
+    if len(ids) > PACKAGE_SEARCH_MAX_CACHED_IDS:
+        cache.set(key, TOO_MANY_RESULTS, PACKAGE_SEARCH_TIMEOUT)
+        return queryset
+    cache.set(key, ids, PACKAGE_SEARCH_TIMEOUT)
+    return ids
+
+
+def load_packages(ids):
+    """Fetch packages for a page of IDs, preserving the result order."""
+    packages = Package.objects.for_list().in_bulk(ids)
+    return [packages[pk] for pk in ids if pk in packages]
+
+
+# Inclusive (min_price, max_price) ranges; the same values become the facet links.
+PRICE_BUCKETS = [
+    (None, Decimal('14999.99'), 'Under ₹15,000'),
+    (Decimal('15000'), Decimal('29999.99'), '₹15,000 – ₹30,000'),
+    (Decimal('30000'), Decimal('59999.99'), '₹30,000 – ₹60,000'),
+    (Decimal('60000'), None, '₹60,000 and above'),
+]
+
+
+def _without(filters, *names):
+    return {name: value for name, value in filters.items() if name not in names}
+
+
+def _price_q(min_price, max_price):
+    q = Q()
+    if min_price is not None:
+        q &= Q(price__gte=min_price)
+    if max_price is not None:
+        q &= Q(price__lte=max_price)
+    return q
+
+
+def compute_package_facets(filters):
+    """
+    Count results per facet value. Each dimension ignores its own filter (so the
+    alternatives stay visible) but respects all the others, and costs one grouped query.
+    """
+    by_category = dict(
+        filter_packages(_without(filters, 'category'), ordered=False)
+        .values_list('category_id').annotate(count=Count('pk')).order_by()
+    )
+    by_type = dict(
+        filter_packages(_without(filters, 'type'), ordered=False)
+        .values_list('package_type').annotate(count=Count('pk')).order_by()
+    )
+    by_price = filter_packages(_without(filters, 'min_price', 'max_price'), ordered=False).aggregate(**{
+        f'bucket_{i}': Count('pk', filter=_price_q(min_price, max_price))
+        for i, (min_price, max_price, _) in enumerate(PRICE_BUCKETS)
+    })
+    by_offer = filter_packages(_without(filters, 'on_offer'), ordered=False).aggregate(
+        on_offer=Count('pk', filter=Q(offer__isnull=False)),
+        no_offer=Count('pk', filter=Q(offer__isnull=True)),
+    )
+    return {
+        'category': by_category,
+        'type': by_type,
+        'price': [by_price[f'bucket_{i}'] for i in range(len(PRICE_BUCKETS))],
+        'on_offer': {True: by_offer['on_offer'], False: by_offer['no_offer']},
+    }
+
+
+def package_facets(filters):
+    """Facet counts for ``filters``, cached by filter signature."""
+    key = versioned_key(f'package_facets:{filter_signature(filters)}')
+    facets = cache.get(key)
+    record_cache_lookup('package_facets', facets is not None)
+    if facets is None:
+        facets = compute_package_facets(filters)
+        cache.set(key, facets, PACKAGE_SEARCH_TIMEOUT)
+    return facets
+
+
+def facet_url(filters, **changes):
+    """Query string for ``filters`` with ``changes`` applied (a None value removes the filter)."""
+    params = dict(filters)
+    for name, value in changes.items():
+        if value is None:
+            params.pop(name, None)
+        else:
+            params[name] = value
+    if 'on_offer' in params:
+        params['on_offer'] = int(params['on_offer'])
+    return '?' + urlencode(sorted(params.items())) if params else '?'
+
+
+def facet_options(filters, facets, categories):
+    """Shape facet counts into labelled, linkable options for the template."""
+    price_selected = (filters.get('min_price'), filters.get('max_price'))
+    return {
+        'category': [
+            {
+                'value': category.pk,
+                'label': category.name,
+                'count': facets['category'].get(category.pk, 0),
+                'selected': filters.get('category') == category.pk,
+                'url': facet_url(filters, category=category.pk),
+            }
+            for category in categories
+        ],
+        'type': [
+            {
+                'value': code,
+                'label': label,
+                'count': facets['type'].get(code, 0),
+                'selected': filters.get('type') == code,
+                'url': facet_url(filters, type=None if filters.get('type') == code else code),
+            }
+            for code, label in Package.PACKAGE_TYPE_CHOICES
+        ],
+        'price': [
+            {
+                'label': label,
+                'count': count,
+                'selected': price_selected == (min_price, max_price),
+                'url': facet_url(filters, min_price=None, max_price=None) if price_selected == (min_price, max_price)
+                else facet_url(filters, min_price=min_price, max_price=max_price),
+            }
+            for (min_price, max_price, label), count in zip(PRICE_BUCKETS, facets['price'])
+        ],
+        'on_offer': [
+            {
+                'label': label,
+                'count': facets['on_offer'][value],
+                'selected': filters.get('on_offer') is value,
+                'url': facet_url(filters, on_offer=None if filters.get('on_offer') is value else value),
+            }
+            for value, label in ((True, 'On offer'), (False, 'Regular price'))
+        ],
+    }
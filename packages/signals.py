@@ -0,0 +1,107 @@
+"""Cache invalidation and image processing hooks for admin-managed content."""
+import logging
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_save
+
+from .caching import bump_content_version
+from .images import image_fields, models_with_images, process_image, save_image_metadata
+from .models import (
+    Package, Category, Offer, TeamMember, InstagramPost, HeroSlide, CTASection, SiteStats, RequestProfile,
+    PackageImage, Itinerary, PackageInclusion, PackageExclusion, Blog, BlogCategory, BlogTag, BlogComment, SitePageMedia,
+)
+from .pagecache import mark_changed
+from .profiling import delete_profile_files
+from .suggest import bump_suggest_version
+
+# Models whose edits change what the cached home context renders.
+HOME_CONTENT_MODELS = (
+    Package,
+    Category,
+    Offer,
+    TeamMember,
+    InstagramPost,
+    HeroSlide,
+    CTASection,
+    SiteStats,
+)
+
+for model in HOME_CONTENT_MODELS:
+    post_save.connect(bump_content_version, sender=model, dispatch_uid=f'content_version_save_{model.__name__}')
+    post_delete.connect(bump_content_version, sender=model, dispatch_uid=f'content_version_delete_{model.__name__}')
+
+# The typeahead index only reads the catalog
+for model in (Package, Category):
+    post_save.connect(bump_suggest_version, sender=model, dispatch_uid=f'suggest_version_save_{model.__name__}')
+    post_delete.connect(bump_suggest_version, sender=model, dispatch_uid=f'suggest_version_delete_{model.__name__}')
+
+# Models rendered by the pages the anonymous page cache (pagecache.py) stores; each only
+# retires the pages that show it.
+PAGE_CONTENT_MODELS = HOME_CONTENT_MODELS + (
+    PackageImage,
+    Itinerary,
+    PackageInclusion,
+    PackageExclusion,
+    Blog,
+    BlogCategory,
+    BlogTag,
+    BlogComment,
+    SitePageMedia,
+)
+
+
+def page_content_changed(sender, **kwargs):
+    mark_changed(sender)
+
+
+def blog_tags_changed(sender, **kwargs):
+    # Admin saves a post's tags after the post itself
+    mark_changed(Blog)
+
+
+for model in PAGE_CONTENT_MODELS:
+    post_save.connect(page_content_changed, sender=model, dispatch_uid=f'page_version_save_{model.__name__}')
+    post_delete.connect(page_content_changed, sender=model, dispatch_uid=f'page_version_delete_{model.__name__}')
+m2m_changed.connect(blog_tags_changed, sender=Blog.tags.through, dispatch_uid='page_version_blog_tags')
+
+
+logger = logging.getLogger(__name__)
+
+
+def mark_new_images(sender, instance, **kwargs):
+    # Runs before FileField.pre_save commits the upload, while a fresh file is still uncommitted
+    instance._new_images = [
+        name for name in image_fields(sender)
+        if getattr(instance, name) and not getattr(instance, name)._committed
+    ]
+
+
+def process_new_images(sender, instance, **kwargs):
+    for name in getattr(instance, '_new_images', ()):
+        transaction.on_commit(partial(_process, instance, name))
+    instance._new_images = []
+
+
+def _process(instance, name):
+    try:
+        save_image_metadata(instance, {name: process_image(getattr(instance, name))})
+    except Exception:
+        # The upload itself is saved; backfill_images can retry it
+        logger.exception('Could not process image %s', getattr(instance, name).name)
+        return
+    # Cached pages rendered between the save and now lack the new metadata
+    bump_content_version()
+    mark_changed(type(instance))
+
+
+for model in models_with_images():
+    pre_save.connect(mark_new_images, sender=model, dispatch_uid=f'mark_new_images_{model.__name__}')
+    post_save.connect(process_new_images, sender=model, dispatch_uid=f'process_new_images_{model.__name__}')
+
+
+def remove_profile_files(sender, instance, **kwargs):
+    delete_profile_files(instance)
+
+
+post_delete.connect(remove_profile_files, sender=RequestProfile, dispatch_uid='remove_profile_files')
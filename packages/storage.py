@@ -0,0 +1,129 @@
+"""Media storages that memoise URL building, and the hashed static files storage.
+
+Templates resolve the same media URLs on every request: a home page render
+asks the storage for several dozen, counting ``srcset`` candidates. For
+Cloudinary each one builds and signs a URL in Python. A file's URL depends
+only on its name (and, for Cloudinary, the requested transformation), so
+each worker keeps the answers in memory and forgets a name when that file is
+saved or deleted through the storage.
+"""
+import logging
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import FileSystemStorage
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+from .images import derivative_name
+
+logger = logging.getLogger(__name__)
+
+# Entries kept per process before the memo is cleared and refilled.
+URL_CACHE_SIZE = 20000
+
+
+class CachedURLMixin:
+    """Memoise ``url()`` and ``derivative_url()`` per file name."""
+
+    # Read by the metrics (packages/metrics.py)
+    url_cache_hits = url_cache_misses = 0
+
+    @property
+    def _url_cache(self):
+        # Created lazily: storages are deconstructible and must not pickle a cache
+        if '_url_cache_dict' not in self.__dict__:
+            self.__dict__['_url_cache_dict'] = {}
+        return self.__dict__['_url_cache_dict']
+
+    def _memoise(self, key, build):
+        cache = self._url_cache
+        try:
+            url = cache[key]
+        except KeyError:
+            self.url_cache_misses += 1
+        else:
+            self.url_cache_hits += 1
+            return url
+        if len(cache) >= URL_CACHE_SIZE:
+            cache.clear()
+        url = cache[key] = build()
+        return url
+
+    def url(self, name):
+        return self._memoise((name,), lambda: self._build_url(name))
+
+    def derivative_url(self, name, width, fmt):
+        return self._memoise((name, width, fmt), lambda: self._derivative_url(name, width, fmt))
+
+    def _build_url(self, name):
+        return super().url(name)
+
+    def _derivative_url(self, name, width, fmt):
+        # Stored derivatives live next to the original (see images.write_derivatives)
+        return self._build_url(derivative_name(name, width, fmt))
+
+    def _save(self, name, content):
+        name = super()._save(name, content)
+        self.forget(name)
+        return name
+
+    def delete(self, name):
+        self.forget(name)
+        return super().delete(name)
+
+    def forget(self, name):
+        for key in [key for key in self._url_cache if key[0] == name]:
+            del self._url_cache[key]
+
+    def uncached(self):
+        """A plain instance of the underlying storage, e.g. for benchmarking."""
+        base = next(cls for cls in type(self).__mro__ if not issubclass(cls, CachedURLMixin))
+        _, args, kwargs = self.deconstruct()
+        return base(*args, **kwargs)
+
+
+class CachedFileSystemStorage(CachedURLMixin, FileSystemStorage):
+    def _clear_cached_properties(self, setting, **kwargs):
+        # Called when MEDIA_URL/MEDIA_ROOT change (e.g. override_settings in tests)
+        super()._clear_cached_properties(setting, **kwargs)
+        self._url_cache.clear()
+
+
+class HashedStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    Content-hashed names (``css/main.3f2a9c1b7e04.css``) with Brotli and gzip
+    copies, so WhiteNoise can serve them compressed with a far-future
+    ``immutable`` Cache-Control.
+
+    The purchased theme's CSS points at a few files it never shipped
+    (``../../assets/img/...``); those references are left as written instead of
+    failing collectstatic, and ``{% static %}`` falls back to the unhashed name
+    for a file missing from the manifest.
+    """
+
+    manifest_strict = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._unhashed = set()
+
+    def url_converter(self, name, hashed_files, template=None):
+        convert = super().url_converter(name, hashed_files, template)
+
+        def tolerant_convert(matchobj):
+            try:
+                return convert(matchobj)
+            except (ValueError, SuspiciousFileOperation) as exc:
+                # post_process makes several passes; report each reference once
+                if (name, matchobj['url']) not in self._unhashed:
+                    self._unhashed.add((name, matchobj['url']))
+                    logger.warning('Leaving %r in %s unhashed: %s', matchobj['url'], name, exc)
+                return matchobj['matched']
+
+        return tolerant_convert
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            logger.warning('Static file %r not found; serving it unhashed', name)
+            return name
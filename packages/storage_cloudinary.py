@@ -0,0 +1,21 @@
+"""Cloudinary media storage with memoised URLs and on-the-fly derivatives.
+
+Kept apart from ``storage.py`` because importing ``cloudinary_storage``
+requires Cloudinary credentials.
+"""
+import cloudinary
+from cloudinary_storage.storage import MediaCloudinaryStorage
+
+from .storage import CachedURLMixin
+
+CLOUDINARY_FORMATS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+
+class CachedMediaCloudinaryStorage(CachedURLMixin, MediaCloudinaryStorage):
+    # Cloudinary resizes on request, so uploads don't need stored derivative files
+    # (its upload names are not predictable enough to store them under anyway).
+    serves_derivatives = True
+
+    def _derivative_url(self, name, width, fmt):
+        resource = cloudinary.CloudinaryResource(self._prepend_prefix(name), default_resource_type=self._get_resource_type(name))
+        return resource.build_url(width=width, crop='limit', format=CLOUDINARY_FORMATS[fmt], quality='auto')
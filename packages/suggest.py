@@ -0,0 +1,128 @@
+"""In-memory prefix index behind the /search/suggest/ typeahead.
+
+Each worker process builds the index once from package names, destination
+tokens, locations and category names, then answers lookups with a binary
+search over sorted terms. The index remembers the suggest version it was
+built for; only the Package/Category signals bump that version, so every
+worker notices a catalog change on its next lookup and rebuilds without any
+cross-process messaging, while blog and page edits leave the index alone.
+"""
+import threading
+from bisect import bisect_left
+from collections import namedtuple
+
+from django.db.models import Count, Q
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from .caching import bump_version, get_version
+from .models import Category, Package
+
+SUGGEST_VERSION_KEY = 'suggest:version'
+SUGGEST_MIN_PREFIX = 2
+SUGGEST_MAX_CANDIDATES = 200
+
+# Lower sorts first when weights tie.
+KIND_ORDER = {'category': 0, 'destination': 1, 'location': 2, 'package': 3}
+
+Suggestion = namedtuple('Suggestion', 'label kind url weight')
+
+
+def normalize_term(text):
+    return ' '.join(text.lower().split())
+
+
+class PrefixIndex:
+    def __init__(self, entries):
+        # entries: iterable of (term, Suggestion); sorted for bisect lookups
+        self.entries = sorted(entries, key=lambda entry: entry[0])
+        self.terms = [term for term, _ in self.entries]
+
+    def lookup(self, prefix, limit):
+        prefix = normalize_term(prefix)
+        if len(prefix) < SUGGEST_MIN_PREFIX:
+            return []
+        matches = {}
+        position = bisect_left(self.terms, prefix)
+        for term, suggestion in self.entries[position:position + SUGGEST_MAX_CANDIDATES]:
+            if not term.startswith(prefix):
+                break
+            matches.setdefault(suggestion.label.lower(), []).append(suggestion)
+        # One suggestion per label: "Goa" as a destination and a location shows once.
+        best = [min(group, key=self.rank) for group in matches.values()]
+        return sorted(best, key=self.rank)[:limit]
+
+    @staticmethod
+    def rank(suggestion):
+        return (-suggestion.weight, KIND_ORDER[suggestion.kind], suggestion.label)
+
+
+def build_index():
+    """Read the active catalog once and return a PrefixIndex."""
+    package_list_url = reverse('packages:package_list')
+    entries = []
+    destination_counts = {}
+    location_counts = {}
+
+    packages = Package.objects.filter(is_active=True).values_list('id', 'name', 'location', 'destinations')
+    for pk, name, location, destinations in packages.iterator(chunk_size=2000):
+        suggestion = Suggestion(name, 'package', reverse('packages:package_detail', args=[pk]), 1)
+        _add_terms(entries, name, suggestion)
+        _count(location_counts, location)
+        for destination in destinations.split(','):
+            _count(destination_counts, destination)
+
+    for kind, counts in (('destination', destination_counts), ('location', location_counts)):
+        for label, count in counts.values():
+            url = f"{package_list_url}?{urlencode({'q': label})}"
+            _add_terms(entries, label, Suggestion(label, kind, url, count))
+
+    categories = Category.objects.filter(is_active=True).annotate(
+        package_count=Count('package', filter=Q(package__is_active=True))
+    ).values_list('id', 'name', 'package_count')
+    for pk, name, count in categories:
+        url = f"{package_list_url}?{urlencode({'category': pk})}"
+        _add_terms(entries, name, Suggestion(name, 'category', url, count))
+
+    return PrefixIndex(entries)
+
+
+def _count(counts, label):
+    """Tally ``label`` case-insensitively, keeping the first spelling seen for display."""
+    label = ' '.join(label.split())
+    if label:
+        key = label.lower()
+        first_label, count = counts.get(key, (label, 0))
+        counts[key] = (first_label, count + 1)
+
+
+def _add_terms(entries, text, suggestion):
+    """Index the whole label plus each later word, so "tea" finds "Munnar Tea Trails"."""
+    words = normalize_term(text).split(' ')
+    for i in range(len(words)):
+        entries.append((' '.join(words[i:]), suggestion))
+
+
+_index = None
+_index_version = None
+_lock = threading.Lock()
+
+
+def bump_suggest_version(**kwargs):
+    """Make every worker rebuild its index. Usable directly as a signal receiver."""
+    bump_version(SUGGEST_VERSION_KEY)
+
+
+def get_index():
+    global _index, _index_version
+    version = get_version(SUGGEST_VERSION_KEY)
+    if _index is None or _index_version != version:
+        with _lock:
+            if _index is None or _index_version != version:
+                _index = build_index()
+                _index_version = version
+    return _index
+
+
+def suggest(prefix, limit=8):
+    return get_index().lookup(prefix, limit)
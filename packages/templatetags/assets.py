@@ -0,0 +1,49 @@
+"""Stylesheet links for the critical-CSS build (see packages/css.py)."""
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from packages.css import CRITICAL_DIR, SITE_CSS, absolute_urls
+
+register = template.Library()
+
+_critical = {}
+
+
+def critical_css(page_type):
+    """The page type's critical CSS with its urls made absolute, or '' if ``build_css`` has not written it."""
+    if page_type in _critical:
+        return _critical[page_type]
+    location = finders.find(f'{CRITICAL_DIR}/{page_type}.css')
+    css = ''
+    if location:
+        with open(location, encoding='utf-8') as f:
+            css = absolute_urls(f.read(), static).replace('</', '<\\/')
+    if not settings.DEBUG:
+        _critical[page_type] = css
+    return css
+
+
+@register.simple_tag
+def deferred_stylesheet(path):
+    """A stylesheet that loads without blocking the first paint, e.g. ``{% deferred_stylesheet 'css/packages.css' %}``."""
+    return format_html(
+        '<link rel="preload" href="{0}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+        '<noscript><link rel="stylesheet" href="{0}"></noscript>',
+        static(path),
+    )
+
+
+@register.simple_tag
+def page_styles(page_type=None):
+    """
+    The site stylesheet. Given a page type with critical CSS (``{% page_styles 'home' %}``)
+    its rules are inlined and the full stylesheet deferred; otherwise it is linked as usual.
+    """
+    css = critical_css(page_type) if page_type else ''
+    if not css:
+        return format_html('<link rel="stylesheet" href="{}">', static(SITE_CSS))
+    return format_html('<style>{}</style>\n{}', mark_safe(css), deferred_stylesheet(SITE_CSS))
@@ -0,0 +1,34 @@
+"""Responsive image attributes for uploaded media (see packages/images.py)."""
+from django import template
+from django.utils.html import format_html_join
+
+from packages.images import image_info, srcset
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_attrs(field_file, sizes='100vw', fmt='webp', dimensions=True):
+    """
+    ``srcset``/``sizes`` for an image field's derivatives, e.g.
+    ``<img src="{{ package.cover_image.url }}" {% responsive_attrs package.cover_image "(max-width: 767px) 100vw, 400px" %}>``.
+
+    Once the image's metadata is recorded this also emits ``width``/``height`` (so the
+    browser reserves the right box; pass ``dimensions=False`` where CSS sets no
+    height) and a blurred placeholder background shown until the image arrives.
+    Renders nothing for an empty field, or for an image that was never processed
+    on a storage that only has the derivatives the pipeline wrote, leaving the
+    plain ``src``.
+    """
+    if not field_file:
+        return ''
+    info = image_info(field_file)
+    if info is None and not getattr(field_file.storage, 'serves_derivatives', False):
+        return ''
+    attrs = [('srcset', srcset(field_file, fmt)), ('sizes', sizes)]
+    if info:
+        if dimensions:
+            attrs += [('width', info['width']), ('height', info['height'])]
+        if not info['alpha']:
+            attrs.append(('style', f"background: {info['color']} url({info['placeholder']}) center / cover no-repeat"))
+    return format_html_join(' ', '{}="{}"', attrs)
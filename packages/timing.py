@@ -0,0 +1,147 @@
+"""Per-request timings: SQL, template rendering and the view.
+
+``RequestTimingMiddleware`` (packages/middleware.py) starts a ``RequestTimings``
+for each request and makes it current. A ``connection.execute_wrapper`` counts
+and times every query, and the ``TimedDjangoTemplates`` backend times template
+rendering. Django's ``template_rendered`` signal only fires under the test
+runner, so the backend is how production measures rendering. The totals go out
+as a ``Server-Timing`` header, which browser dev tools show under the request's
+Timing tab, and as one log line per request on the ``packages.timing`` logger.
+A SELECT that a request runs more than once (the same statement, whatever its
+parameters, usually an N+1 loop) is logged at WARNING.
+"""
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+# A statement run this many times in one request is reported as duplicated.
+DUPLICATE_QUERY_THRESHOLD = 2
+
+_current = ContextVar('request_timings', default=None)
+
+
+def current_timings():
+    """The ``RequestTimings`` of the request being handled, or None outside one."""
+    return _current.get()
+
+
+class RequestTimings:
+    def __init__(self, slow_query_seconds=None):
+        self.start = time.perf_counter()
+        self.view_start = None
+        self.end = None
+        self.queries = 0
+        self.db = 0.0
+        self.template = 0.0
+        # Per statement: times run, total and longest seconds
+        self.statements = Counter()
+        self.statement_seconds = Counter()
+        self.statement_max = {}
+        # (database alias, sql, params, seconds) of single statements slower than slow_query_seconds
+        self.slow_query_seconds = slow_query_seconds
+        self.slow_queries = []
+        self._render_depth = 0
+
+    @property
+    def total(self):
+        return (self.end or time.perf_counter()) - self.start
+
+    @property
+    def view(self):
+        """Seconds from the view being called to the response (rendering and queries included)."""
+        return (self.end or time.perf_counter()) - self.view_start if self.view_start else 0.0
+
+    def execute(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.db += elapsed
+            self.queries += 1
+            self.statements[sql] += 1
+            self.statement_seconds[sql] += elapsed
+            if elapsed > self.statement_max.get(sql, 0):
+                self.statement_max[sql] = elapsed
+            if self.slow_query_seconds is not None and elapsed >= self.slow_query_seconds and not many:
+                self.slow_queries.append((context['connection'].alias, sql, params, elapsed))
+
+    @contextmanager
+    def rendering(self):
+        # Templates rendered while rendering another (e.g. by a template tag) are already being timed
+        self._render_depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._render_depth -= 1
+            if not self._render_depth:
+                self.template += time.perf_counter() - start
+
+    def duplicates(self):
+        """
+        [(sql, times run)] for SELECTs run at least ``DUPLICATE_QUERY_THRESHOLD`` times,
+        most repeated first. Writes are left out: saving two related rows is not an N+1.
+        """
+        return [
+            (sql, count) for sql, count in self.statements.most_common()
+            if count >= DUPLICATE_QUERY_THRESHOLD and sql.lstrip()[:6].upper() == 'SELECT'
+        ]
+
+    def server_timing(self):
+        """The ``Server-Timing`` header value; durations are in milliseconds."""
+        metrics = [
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template * 1000:.1f};desc="Templates"',
+            f'view;dur={self.view * 1000:.1f};desc="View"',
+            f'total;dur={self.total * 1000:.1f}',
+        ]
+        duplicated = sum(count for _, count in self.duplicates())
+        if duplicated:
+            metrics.insert(1, f'dup;desc="{duplicated} duplicate queries"')
+        return ', '.join(metrics)
+
+    @contextmanager
+    def watching_queries(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self.execute))
+            yield
+
+    @contextmanager
+    def activate(self):
+        token = _current.set(self)
+        try:
+            with self.watching_queries():
+                yield self
+        finally:
+            self.end = time.perf_counter()
+            _current.reset(token)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = current_timings()
+        if timings is None:
+            return super().render(context, request)
+        with timings.rendering():
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing renders for the current request's ``RequestTimings``."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -8,6 +8,7 @@ urlpatterns = [
     path('packages/', views.PackageListView.as_view(), name='package_list'),
     path('package/<int:pk>/', views.PackageDetailView.as_view(), name='package_detail'),
     path('search/', views.search_packages, name='search_packages'),
+    path('search/suggest/', views.search_suggest, name='search_suggest'),
     path('about/', views.about, name='about'),
     path('contact/', views.contact, name='contact'),
     path('blog/', views.blog, name='blog'),
@@ -1,76 +1,65 @@
 from django.shortcuts import render, get_object_or_404
 from django.views.generic import ListView, DetailView
-from django.db.models import Q, Max
+from django.db.models import Q, Count
 from django.http import JsonResponse
 from django.core.paginator import Paginator
-from django.core.mail import send_mail, EmailMessage
-from django.conf import settings
-from django.template.loader import render_to_string
-from .models import Package, Category, Offer, TeamMember, SiteStats, Itinerary, BlogCategory, BlogTag, Blog, BlogComment, Contact, InstagramPost, HeroSlide, CTASection
+from django.db import transaction
+from django.utils.decorators import method_decorator
+from .models import (
+    Package, Category, Offer, TeamMember, SiteStats, Itinerary, PackageImage, PackageInclusion, PackageExclusion,
+    BlogCategory, BlogTag, Blog, BlogComment, Contact, InstagramPost, HeroSlide, CTASection, SitePageMedia,
+)
+from .caching import get_home_context
+from .pagecache import cache_anonymous_page, latest_update
+from .search import (
+    normalize_package_filters, filter_packages, package_results, load_packages, package_facets, facet_options, facet_url,
+    PACKAGE_LIST_ORDERING,
+)
+from .pagination import KeysetPaginator, use_keyset_pagination
+from .suggest import suggest
+from .counters import blog_views
+from .mail import queue_contact_emails
 
-def home(request):
-    """Home page view with dynamic content"""
-    # Get featured packages for hero slider
-    featured_packages = Package.objects.filter(
-        is_active=True, 
-        is_featured=True
-    )[:3]
-    
-    # Get popular packages for destination section
-    popular_packages = Package.objects.filter(
-        is_active=True,
-        is_popular=True
-    )[:8]
-    
-    # Get all categories with package counts
-    categories = Category.objects.filter(is_active=True)
-    for category in categories:
-        category.package_count = Package.objects.filter(
-            category=category, 
-            is_active=True
-        ).count()
-    
-    # Get active offers - show the one with highest discount first
-    active_offers = Offer.objects.filter(
-        is_active=True
-    ).order_by('-discount_percentage', 'valid_to')[:3]
-    
-    # Calculate highest discount percentage
-    highest_discount = 0
-    if active_offers.exists():
-        highest_discount = active_offers.aggregate(
-            max_discount=Max('discount_percentage')
-        )['max_discount'] or 0
-    
-    # Get team members
-    team_members = TeamMember.objects.filter(is_active=True)[:4]
-    
-    # Instagram feed for homepage slider
-    instagram_posts = InstagramPost.objects.filter(is_active=True)
-    
-    # Get site statistics
-    try:
-        site_stats = SiteStats.objects.first()
-    except Exception:
-        site_stats = None
+# Models each page cached for anonymous visitors renders; a change to any of them retires the page.
+# SitePageMedia feeds every page through the page_media context processor.
+HOME_PAGE_MODELS = (Package, Category, Offer, TeamMember, InstagramPost, HeroSlide, CTASection, SiteStats, SitePageMedia)
+PACKAGE_LIST_MODELS = (Package, Category, Offer, SitePageMedia)
+PACKAGE_DETAIL_MODELS = (Package, Category, Offer, PackageImage, Itinerary, PackageInclusion, PackageExclusion, SitePageMedia)
+ABOUT_PAGE_MODELS = (TeamMember, SiteStats, SitePageMedia)
+BLOG_LIST_MODELS = (Blog, BlogCategory, BlogTag, SitePageMedia)
+BLOG_DETAIL_MODELS = (Blog, BlogCategory, BlogTag, BlogComment, SitePageMedia)
 
-    hero_slides = list(HeroSlide.objects.filter(is_active=True))
-    cta_section = CTASection.objects.filter(is_active=True).first()
-    
-    context = {
-        'featured_packages': featured_packages,
-        'popular_packages': popular_packages,
-        'categories': categories,
-        'active_offers': active_offers,
-        'highest_discount': highest_discount,
-        'team_members': team_members,
-        'instagram_posts': instagram_posts,
-        'site_stats': site_stats,
-        'hero_slides': hero_slides,
-        'cta_section': cta_section,
-    }
+def package_detail_modified(request, pk):
+    # None for a missing or inactive package; then the view decides what to answer
+    return latest_update(
+        Package.objects.filter(pk=pk, is_active=True),
+        Package.objects.filter(category__package__pk=pk), Category.objects.filter(package__pk=pk),
+        Offer.objects.filter(package__pk=pk), PackageImage.objects.filter(package=pk),
+        Itinerary.objects.filter(package=pk), PackageInclusion.objects.filter(package=pk),
+        PackageExclusion.objects.filter(package=pk), SitePageMedia,
+    )
+
+def blog_detail_modified(request, slug):
+    # None for a missing, draft or hidden post (the view answers 404)
+    return latest_update(
+        Blog.objects.filter(slug=slug, status='published', is_active=True),
+        Blog.objects.filter(category__blogs__slug=slug), BlogCategory,
+        BlogComment.objects.filter(blog__slug=slug), SitePageMedia,
+    )
+
+def count_cached_blog_view(request, slug):
+    # The view counts the reads it renders; this counts those answered from the page cache
+    pk = Blog.objects.filter(slug=slug, status='published', is_active=True).values_list('pk', flat=True).first()
+    if pk is not None:
+        blog_views.add(pk)
+
+@cache_anonymous_page(HOME_PAGE_MODELS)
+def home(request):
+    """Home page view with dynamic content (cached until admin content changes)"""
+    context = get_home_context()
     return render(request, 'index.html', context)
 
+@method_decorator(cache_anonymous_page(PACKAGE_LIST_MODELS), name='dispatch')
 class PackageListView(ListView):
     model = Package
     template_name = 'packages.html'
@@ -78,96 +67,76 @@ class PackageListView(ListView):
     paginate_by =8
     
     def get_queryset(self):
-        queryset = Package.objects.filter(is_active=True)
-        
-        # Filter by category
-        category_id = self.request.GET.get('category')
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
-        
-        # Filter by package type
-        package_type = self.request.GET.get('type')
-        if package_type:
-            queryset = queryset.filter(package_type=package_type)
-        
-        # Filter by price range
-        min_price = self.request.GET.get('min_price')
-        max_price = self.request.GET.get('max_price')
-        if min_price:
-            queryset = queryset.filter(price__gte=min_price)
-        if max_price:
-            queryset = queryset.filter(price__lte=max_price)
-        
-        # Search functionality
-        search_query = self.request.GET.get('q')
-        if search_query:
-            queryset = queryset.filter(
-                Q(name__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(destinations__icontains=search_query) |
-                Q(location__icontains=search_query)
-            )
-        
-        return queryset.order_by('-is_featured', '-created_at')
+        self.filters = normalize_package_filters(self.request.GET)
+        # Keyset mode applies to the default sort order; ranked searches keep offset pages
+        self.keyset = use_keyset_pagination(self.request) and 'q' not in self.filters
+        if self.keyset:
+            return filter_packages(self.filters, ordered=False).for_list()
+        results = package_results(self.filters)
+        return results if isinstance(results, list) else results.for_list()
+    
+    def paginate_queryset(self, queryset, page_size):
+        if self.keyset:
+            paginator = KeysetPaginator(queryset, page_size, PACKAGE_LIST_ORDERING)
+            page = paginator.page(self.request.GET.get('cursor'))
+            return paginator, page, page.object_list, page.has_other_pages()
+        paginator, page, object_list, is_paginated = super().paginate_queryset(queryset, page_size)
+        if isinstance(queryset, list):
+            # Cached result IDs: load just this page's packages
+            page.object_list = object_list = load_packages(list(object_list))
+        return paginator, page, object_list, is_paginated
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['categories'] = Category.objects.filter(is_active=True)
+        categories = list(Category.objects.filter(is_active=True))
+        context['categories'] = categories
         context['package_types'] = Package.PACKAGE_TYPE_CHOICES
+        context['query'] = self.request.GET.get('q', '').strip()
+        context['selected_category'] = str(self.filters.get('category', ''))
+        context['selected_type'] = self.filters.get('type', '')
+        context['filters'] = self.filters
+        context['filter_query'] = facet_url(self.filters)[1:]
+        context['facets'] = facet_options(self.filters, package_facets(self.filters), categories)
+        context['keyset'] = self.keyset
         return context
 
+@method_decorator(cache_anonymous_page(PACKAGE_DETAIL_MODELS, package_detail_modified), name='dispatch')
 class PackageDetailView(DetailView):
     model = Package
     template_name = 'package_details.html'
     context_object_name = 'package'
+    queryset = Package.objects.for_detail()
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['related_packages'] = Package.objects.filter(
-            category=self.object.category,
+        context['related_packages'] = Package.objects.for_card().filter(
+            category=self.object.category_id,
             is_active=True
         ).exclude(id=self.object.id)[:3]
-        context['package_images'] = self.object.packageimage_set.filter(is_active=True)
-        context['itineraries'] = self.object.itineraries.filter(is_active=True)
-        context['inclusions'] = self.object.inclusions.filter(is_active=True)
-        context['exclusions'] = self.object.exclusions.filter(is_active=True)
+        context['package_images'] = self.object.active_images
+        context['itineraries'] = self.object.active_itineraries
+        context['inclusions'] = self.object.active_inclusions
+        context['exclusions'] = self.object.active_exclusions
         return context
 
 def search_packages(request):
-    """Search functionality"""
+    """Search functionality (same filter pipeline and template as the package list)"""
+    return PackageListView.as_view()(request)
+
+def search_suggest(request):
+    """Typeahead suggestions for the package search box (served from the in-memory prefix index)"""
     query = request.GET.get('q', '')
-    category = request.GET.get('category', '')
-    package_type = request.GET.get('type', '')
-    
-    packages = Package.objects.filter(is_active=True)
-    
-    if query:
-        packages = packages.filter(
-            Q(name__icontains=query) |
-            Q(description__icontains=query) |
-            Q(destinations__icontains=query) |
-            Q(location__icontains=query)
-        )
-    
-    if category:
-        packages = packages.filter(category_id=category)
-    
-    if package_type:
-        packages = packages.filter(package_type=package_type)
-    
-    categories = Category.objects.filter(is_active=True)
-    
-    context = {
-        'packages': packages,
-        'categories': categories,
-        'package_types': Package.PACKAGE_TYPE_CHOICES,
-        'query': query,
-        'selected_category': category,
-        'selected_type': package_type,
-    }
-    
-    return render(request, 'packages/search_results.html', context)
+    try:
+        limit = min(max(int(request.GET.get('limit', 8)), 1), 20)
+    except ValueError:
+        limit = 8
+    suggestions = [
+        {'label': s.label, 'type': s.kind, 'url': s.url}
+        for s in suggest(query, limit)
+    ]
+    return JsonResponse({'query': query, 'suggestions': suggestions})
 
+@cache_anonymous_page(ABOUT_PAGE_MODELS)
 def about(request):
     team_members = TeamMember.objects.filter(is_active=True)[:4]
     try:
@@ -190,61 +159,29 @@ def contact(request):
         message = request.POST.get('message')
         
         if name and email and message:
-            # Save contact to database
-            contact = Contact.objects.create(
-                name=name,
-                email=email,
-                phone=phone,
-                service=service,
-                message=message
-            )
-            
-            # Send email notification to admin
-            try:
-                # Email to admin using HTML template
-                admin_subject = f'New Contact Form Submission from {name}'
-                admin_html_message = render_to_string('emails/contact_notification.html', {
-                    'contact': contact
-                })
-                
-                admin_email = EmailMessage(
-                    subject=admin_subject,
-                    body=admin_html_message,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    to=[settings.ADMIN_EMAIL] if hasattr(settings, 'ADMIN_EMAIL') else ['admin@natureholidays.com']
-                )
-                admin_email.content_subtype = "html"
-                admin_email.send()
-                
-                # Email confirmation to customer using HTML template
-                customer_subject = 'Thank you for contacting Nature Holidays'
-                customer_html_message = render_to_string('emails/contact_confirmation.html', {
-                    'contact': contact
-                })
-                
-                customer_email = EmailMessage(
-                    subject=customer_subject,
-                    body=customer_html_message,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    to=[email]
+            # Save the contact and queue both emails together; run_mail_worker sends them
+            with transaction.atomic():
+                contact = Contact.objects.create(
+                    name=name,
+                    email=email,
+                    phone=phone,
+                    service=service,
+                    message=message
                 )
-                customer_email.content_subtype = "html"
-                customer_email.send()
-                
-                return JsonResponse({'success': True})
-                
-            except Exception as e:
-                # If email fails, still save the contact but log the error
-                print(f"Email sending failed: {e}")
-                return JsonResponse({'success': True, 'email_error': 'Message saved but email notification failed'})
+                queue_contact_emails(contact)
+            return JsonResponse({'success': True})
         else:
             return JsonResponse({'success': False, 'error': 'Please fill all required fields'})
     
     return render(request, 'contact.html')
 
+# Descending sort key of the blog list (Blog.Meta.ordering plus pk as a unique tiebreaker)
+BLOG_LIST_ORDERING = ('published_date', 'created_at', 'pk')
+
+@cache_anonymous_page(BLOG_LIST_MODELS)
 def blog(request):
     """Blog listing page with search and filtering"""
-    blogs = Blog.objects.filter(status='published', is_active=True)
+    blogs = Blog.objects.for_list().filter(status='published', is_active=True)
     
     # Search functionality
     search_query = request.GET.get('q')
@@ -266,14 +203,19 @@ def blog(request):
     if tag_slug:
         blogs = blogs.filter(tags__slug=tag_slug)
     
-    # Pagination
-    paginator = Paginator(blogs, 6)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination (keyset mode skips OFFSET scans and the exact COUNT)
+    keyset = use_keyset_pagination(request)
+    if keyset:
+        paginator = KeysetPaginator(blogs, 6, BLOG_LIST_ORDERING, nullable=['published_date'])
+        page_obj = paginator.page(request.GET.get('cursor'))
+    else:
+        paginator = Paginator(blogs, 6)
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
     
     # Sidebar data
     categories = BlogCategory.objects.filter(is_active=True)
-    recent_blogs = Blog.objects.filter(status='published', is_active=True)[:3]
+    recent_blogs = Blog.objects.for_card().filter(status='published', is_active=True)[:3]
     popular_tags = BlogTag.objects.filter(is_active=True, blogs__isnull=False).distinct()[:10]
     
     context = {
@@ -285,23 +227,27 @@ def blog(request):
         'search_query': search_query,
         'selected_category': category_slug,
         'selected_tag': tag_slug,
+        'keyset': keyset,
     }
     return render(request, 'blog.html', context)
 
+@cache_anonymous_page(BLOG_DETAIL_MODELS, blog_detail_modified, on_hit=count_cached_blog_view)
 def blog_detail(request, slug):
     """Blog detail page with comments"""
-    blog = get_object_or_404(Blog, slug=slug, status='published', is_active=True)
+    blog = get_object_or_404(Blog.objects.for_detail(), slug=slug, status='published', is_active=True)
     
     # Get related blogs
-    related_blogs = Blog.objects.filter(
-        category=blog.category,
+    related_blogs = Blog.objects.for_card().filter(
+        category=blog.category_id,
         status='published',
         is_active=True
     ).exclude(id=blog.id)[:3]
     
     # Get comments
     comments = blog.comments.filter(is_active=True)
-    categories = BlogCategory.objects.filter(is_active=True)
+    categories = BlogCategory.objects.filter(is_active=True).annotate(
+        blog_count=Count('blogs', filter=Q(blogs__status='published', blogs__is_active=True))
+    )
     
     # Handle comment submission
     if request.method == 'POST':
@@ -318,6 +264,9 @@ def blog_detail(request, slug):
             )
             return JsonResponse({'success': True})
     
+    # Buffered in this worker and written in batches (see counters.py)
+    blog_views.add(blog.pk)
+    
     context = {
         'blog': blog,
         'related_blogs': related_blogs,